@@ -18,3 +18,42 @@ def load_config(path: str = "config/system.yaml") -> dict:
         _CONFIG_CACHE = yaml.safe_load(f)
 
     return _CONFIG_CACHE
+
+
+def load_points(path: str = "config/config.yaml") -> dict:
+    """
+    Points table {point: {type, rpm, ...}}, keys lower-cased.
+    Missing file → empty table (every point uses the defaults).
+    """
+    config_path = Path(path)
+    if not config_path.exists():
+        return {}
+
+    with open(config_path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    return {
+        str(name).lower(): spec or {}
+        for name, spec in (data.get("points") or {}).items()
+    }
+
+
+def load_rules(path: str = "config/fault_rules.yaml") -> list:
+    """
+    L2 fault rule table [{fault_type, severity, conditions}, ...].
+    Raises ValueError on a missing or malformed file.
+    """
+    config_path = Path(path)
+    if not config_path.exists():
+        raise ValueError(f"Rules file not found: {path}")
+
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    except yaml.YAMLError as exc:
+        raise ValueError(f"Invalid YAML: {exc}") from None
+
+    rules = data.get("rules")
+    if not isinstance(rules, list):
+        raise ValueError("'rules' must be a list")
+    return rules
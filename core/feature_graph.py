@@ -0,0 +1,274 @@
+import numpy as np
+
+from core.machine_kinematics import SHAFT_ORDERS
+from core.signal_utils import (
+    band_bin_slice,
+    band_energy_from_spectrum,
+    analytic_signal_from_spectrum,
+)
+
+
+# ==================================================
+# REGISTRY
+# ==================================================
+class FeatureNode:
+    def __init__(self, name, fn, requires=()):
+        self.name = name
+        self.fn = fn
+        self.requires = tuple(requires)
+
+
+FEATURES = {}
+
+
+def register_feature(name, requires=()):
+    """
+    Register a feature / intermediate. ``fn(ctx)`` returns one value per
+    window (array over the batch) and reads its inputs via ``ctx[dep]``;
+    ``requires`` declares those inputs.
+    """
+    def decorator(fn):
+        FEATURES[name] = FeatureNode(name, fn, requires)
+        return fn
+    return decorator
+
+
+def feature_plan(names):
+    """
+    Every node needed for ``names`` (dependencies first).
+    Raises KeyError for unknown feature names.
+    """
+    order = []
+    seen = set()
+
+    def visit(name):
+        if name in seen:
+            return
+        node = FEATURES[name]
+        for dep in node.requires:
+            visit(dep)
+        seen.add(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+class FeatureContext:
+    """
+    Lazy evaluation over one batch of windows [n_points, n_samples].
+    Each node runs at most once per batch (memoized); nodes nobody asks
+    for are never computed.
+    """
+
+    def __init__(self, pipeline, acc, time_stats=None, profiles=None):
+        self.pipeline = pipeline
+        self.acc = acc
+        self.n = acc.shape[1]
+        self.time_stats = time_stats
+        self.profiles = profiles      # PointProfile (or None) per row
+        self._memo = {}
+
+    def __getitem__(self, name):
+        value = self._memo.get(name)
+        if value is None:
+            value = FEATURES[name].fn(self)
+            self._memo[name] = value
+        return value
+
+    def take(self, rows):
+        """
+        Context over a subset of rows, sharing what is already computed.
+        """
+        sub = FeatureContext(
+            self.pipeline,
+            self.acc[rows],
+            time_stats=_take_list(self.time_stats, rows),
+            profiles=_take_list(self.profiles, rows),
+        )
+        sub._memo = {name: value[rows] for name, value in self._memo.items()}
+        return sub
+
+
+def _take_list(values, rows):
+    return None if values is None else [values[i] for i in rows]
+
+
+# ==================================================
+# INTERMEDIATES
+# ==================================================
+@register_feature("spectrum")
+def _spectrum(ctx):
+    return ctx.pipeline.fft.rfft(ctx.acc, axis=1)
+
+
+@register_feature("envelope", requires=("spectrum",))
+def _envelope(ctx):
+    return np.abs(
+        analytic_signal_from_spectrum(ctx["spectrum"], ctx.n, ctx.pipeline.fft)
+    )
+
+
+@register_feature("velocity")
+def _velocity(ctx):
+    """
+    acc[g] → m/s² → integrate → detrend (m/s)
+    """
+    dtype = ctx.pipeline.dtype
+    vel_m_s = np.cumsum(ctx.acc * dtype.type(9.80665), axis=1)
+    vel_m_s /= dtype.type(ctx.pipeline.fs)
+    vel_m_s -= np.mean(vel_m_s, axis=1, keepdims=True)
+    return vel_m_s
+
+
+@register_feature("centered")
+def _centered(ctx):
+    return ctx.acc - np.mean(ctx.acc, axis=1, keepdims=True)
+
+
+@register_feature("variance", requires=("centered",))
+def _variance(ctx):
+    return np.mean(ctx["centered"] ** 2, axis=1)
+
+
+def _band_energy(ctx, band, low, high):
+    return band_energy_from_spectrum(
+        ctx["spectrum"], band_bin_slice(ctx.n, ctx.pipeline.fs, low, high)
+    )
+
+
+def _register_band(band):
+    @register_feature(f"band_energy:{band}", requires=("spectrum",))
+    def _fn(ctx):
+        return _band_energy(ctx, band, *ctx.pipeline.BANDS[band])
+
+
+for _band in ("hf", "low", "high"):
+    _register_band(_band)
+
+
+# ==================================================
+# CORE L1 FEATURES
+# ==================================================
+def _from_time_stats(ctx, key):
+    if ctx.time_stats is None:
+        return None
+    return np.array([s[key] for s in ctx.time_stats])
+
+
+@register_feature("acc_rms_g")
+def _acc_rms(ctx):
+    value = _from_time_stats(ctx, "acc_rms_g")
+    if value is None:
+        value = np.sqrt(np.mean(ctx.acc ** 2, axis=1))
+    return value
+
+
+@register_feature("acc_peak_g")
+def _acc_peak(ctx):
+    value = _from_time_stats(ctx, "acc_peak_g")
+    if value is None:
+        value = (np.max(ctx.acc, axis=1) - np.min(ctx.acc, axis=1)) / 2.0
+    return value
+
+
+@register_feature("acc_hf_rms_g", requires=("band_energy:hf",))
+def _acc_hf_rms(ctx):
+    # energy → RMS-like magnitude
+    return np.sqrt(np.maximum(ctx["band_energy:hf"], 0.0) / ctx.n)
+
+
+@register_feature("crest_factor", requires=("acc_peak_g", "acc_rms_g"))
+def _crest_factor(ctx):
+    acc_rms = ctx["acc_rms_g"]
+    return np.divide(
+        ctx["acc_peak_g"],
+        acc_rms,
+        out=np.zeros_like(acc_rms),
+        where=acc_rms > 0,
+    )
+
+
+@register_feature("envelope_rms", requires=("envelope",))
+def _envelope_rms(ctx):
+    return np.sqrt(np.mean(ctx["envelope"] ** 2, axis=1))
+
+
+@register_feature("overall_vel_rms_mm_s", requires=("velocity",))
+def _overall_vel_rms(ctx):
+    value = _from_time_stats(ctx, "overall_vel_rms_mm_s")
+    if value is None:
+        value = np.sqrt(np.mean(ctx["velocity"] ** 2, axis=1)) * 1000.0
+    return value
+
+
+@register_feature("energy_low", requires=("band_energy:low",))
+def _energy_low(ctx):
+    return ctx["band_energy:low"]
+
+
+@register_feature("energy_high", requires=("band_energy:high",))
+def _energy_high(ctx):
+    return ctx["band_energy:high"]
+
+
+# ==================================================
+# OPTIONAL FEATURES (PER-POINT PROFILES)
+# ==================================================
+@register_feature("kurtosis", requires=("centered", "variance"))
+def _kurtosis(ctx):
+    # Pearson kurtosis (Gaussian = 3), impulsiveness indicator
+    var = ctx["variance"]
+    m4 = np.mean(ctx["centered"] ** 4, axis=1)
+    return np.divide(m4, var ** 2, out=np.zeros_like(var), where=var > 0)
+
+
+@register_feature("skewness", requires=("centered", "variance"))
+def _skewness(ctx):
+    var = ctx["variance"]
+    m3 = np.mean(ctx["centered"] ** 3, axis=1)
+    return np.divide(m3, var ** 1.5, out=np.zeros_like(var), where=var > 0)
+
+
+# ±ORDER_HALF_WIDTH orders around k × running speed (rows without profile)
+ORDER_HALF_WIDTH = 0.1
+
+
+def _order_bins(ctx, row, name):
+    """
+    Bin slice of an order band for one row: the point profile's
+    precomputed table, else shaft orders from the pipeline rpm.
+    """
+    if ctx.profiles is not None and ctx.profiles[row] is not None:
+        return ctx.profiles[row].bins.get(name)
+
+    order = SHAFT_ORDERS.get(name)
+    if order is None:
+        return None
+    fr = ctx.pipeline.rpm / 60.0
+    return band_bin_slice(
+        ctx.n,
+        ctx.pipeline.fs,
+        (order - ORDER_HALF_WIDTH) * fr,
+        (order + ORDER_HALF_WIDTH) * fr,
+    )
+
+
+def _register_order(name, feature):
+    @register_feature(feature, requires=("spectrum",))
+    def _fn(ctx):
+        spectrum = ctx["spectrum"]
+        energy = np.zeros(spectrum.shape[0], dtype=spectrum.real.dtype)
+        for row in range(spectrum.shape[0]):
+            bins = _order_bins(ctx, row, name)
+            if bins is not None:
+                energy[row] = band_energy_from_spectrum(spectrum[row], bins)
+        return np.sqrt(energy / ctx.n)
+
+
+# order_1x_rms .. order_3x_rms, gmf_rms, bpfo_rms, bpfi_rms, bsf_rms, ftf_rms
+for _name in SHAFT_ORDERS:
+    _register_order(_name, f"order_{_name}_rms")
+for _name in ("gmf", "bpfo", "bpfi", "bsf", "ftf"):
+    _register_order(_name, f"{_name}_rms")
@@ -0,0 +1,200 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+import scipy.fft
+
+log = logging.getLogger(__name__)
+
+
+class FFTBackend:
+    """
+    Minimal FFT surface used by L1 / L2:
+    rfft + complex ifft along one axis, plus cached frequency grids.
+    """
+
+    name = "base"
+
+    def rfft(self, x, axis=-1):
+        raise NotImplementedError
+
+    def ifft(self, x, axis=-1):
+        raise NotImplementedError
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def rfftfreq(n, fs, dtype=np.float64):
+        """
+        Frequency grid per (n, fs, dtype), computed once, read-only.
+        """
+        freqs = np.fft.rfftfreq(n, 1 / fs).astype(dtype)
+        freqs.flags.writeable = False
+        return freqs
+
+
+class NumpyFFTBackend(FFTBackend):
+    name = "numpy"
+
+    def rfft(self, x, axis=-1):
+        return np.fft.rfft(x, axis=axis)
+
+    def ifft(self, x, axis=-1):
+        return np.fft.ifft(x, axis=axis)
+
+
+class ScipyFFTBackend(FFTBackend):
+    """
+    scipy.fft (pocketfft): keeps float32 in single precision, caches
+    twiddles internally, and spreads batched (2-D) transforms over
+    ``workers`` threads.
+    """
+
+    name = "scipy"
+
+    def __init__(self, workers: int = 1):
+        self.workers = max(int(workers), 1)
+
+    def rfft(self, x, axis=-1):
+        return scipy.fft.rfft(x, axis=axis, workers=self._workers_for(x))
+
+    def ifft(self, x, axis=-1):
+        return scipy.fft.ifft(x, axis=axis, workers=self._workers_for(x))
+
+    def _workers_for(self, x):
+        # threads only help when there are several transforms
+        return self.workers if np.ndim(x) > 1 and x.shape[0] > 1 else 1
+
+
+class FFTWBackend(FFTBackend):
+    """
+    Optional pyFFTW backend with one planned FFTW object per
+    (shape, dtype, axis). Plans are built with FFTW_MEASURE on first use.
+    A plan owns its input / output buffers, so each plan has a lock
+    held across execute + copy (L1 workers and L2 threads share plans).
+    """
+
+    name = "pyfftw"
+
+    def __init__(self, workers: int = 1):
+        import pyfftw.builders  # optional dependency
+
+        self._builders = pyfftw.builders
+        self.workers = max(int(workers), 1)
+        self._plans = {}              # key → (plan, execute lock)
+        self._lock = threading.Lock()
+
+    def _plan(self, kind, x, axis):
+        key = (kind, x.shape, x.dtype.str, axis)
+        plan = self._plans.get(key)
+        if plan is None:
+            with self._lock:
+                plan = self._plans.get(key)
+                if plan is None:
+                    builder = getattr(self._builders, kind)
+                    fftw = builder(
+                        np.empty(x.shape, dtype=x.dtype),
+                        axis=axis,
+                        threads=self.workers,
+                        planner_effort="FFTW_MEASURE",
+                    )
+                    plan = (fftw, threading.Lock())
+                    self._plans[key] = plan
+        return plan
+
+    def _execute(self, kind, x, axis):
+        x = np.asarray(x)
+        plan, lock = self._plan(kind, x, axis)
+        # plan input / output buffers are reused → run and copy under lock
+        with lock:
+            return plan(x).copy()
+
+    def rfft(self, x, axis=-1):
+        return self._execute("rfft", x, axis)
+
+    def ifft(self, x, axis=-1):
+        return self._execute("ifft", x, axis)
+
+
+# ==================================================
+# BACKEND SELECTION (PROCESS WIDE)
+# ==================================================
+_BACKEND = ScipyFFTBackend()
+
+
+def get_fft_backend() -> FFTBackend:
+    return _BACKEND
+
+
+def set_fft_backend(backend: FFTBackend):
+    global _BACKEND
+    _BACKEND = backend
+
+
+def make_fft_backend(name: str, workers: int = 1) -> FFTBackend:
+    if name == "numpy":
+        return NumpyFFTBackend()
+    if name == "scipy":
+        return ScipyFFTBackend(workers=workers)
+    if name == "pyfftw":
+        return FFTWBackend(workers=workers)
+    raise ValueError(f"Unknown FFT backend: {name}")
+
+
+def benchmark_fft_backends(backends, n=4096, batch=8, dtype=np.float64, repeat=20):
+    """
+    Median time (s) of one batched rfft + ifft per backend.
+    """
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((batch, n)).astype(dtype)
+
+    results = {}
+    for backend in backends:
+        spec = backend.rfft(x, axis=1)      # warm-up / planning
+        full = np.zeros((batch, n), dtype=np.result_type(spec.dtype, np.complex64))
+        full[:, : spec.shape[1]] = spec
+        backend.ifft(full, axis=1)
+
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            backend.rfft(x, axis=1)
+            backend.ifft(full, axis=1)
+            samples.append(time.perf_counter() - t0)
+        results[backend.name] = float(np.median(samples))
+
+    return results
+
+
+def configure_fft_backend(cfg: dict | None, n=4096, batch=8, dtype=np.float64):
+    """
+    cfg: {"backend": auto|numpy|scipy|pyfftw, "workers": int}
+    "auto" benchmarks every available backend and keeps the fastest.
+    """
+    cfg = cfg or {}
+    name = cfg.get("backend", "scipy")
+    workers = cfg.get("workers", 1)
+
+    if name != "auto":
+        backend = make_fft_backend(name, workers)
+        set_fft_backend(backend)
+        return backend
+
+    candidates = [NumpyFFTBackend(), ScipyFFTBackend(workers=workers)]
+    try:
+        candidates.append(FFTWBackend(workers=workers))
+    except ImportError:
+        pass
+
+    timings = benchmark_fft_backends(candidates, n=n, batch=batch, dtype=dtype)
+    backend = min(candidates, key=lambda b: timings[b.name])
+
+    log.info(
+        "[FFT] backend=%s | %s",
+        backend.name,
+        ", ".join(f"{k}={v * 1e6:.0f}us" for k, v in timings.items()),
+    )
+
+    set_fft_backend(backend)
+    return backend
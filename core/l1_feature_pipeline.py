@@ -1,10 +1,7 @@
-import numpy as np 
-from scipy.signal import hilbert, detrend 
-from core.signal_utils import (
-    rms,
-    peak_to_peak,
-    bandpass_energy,
-)
+import numpy as np
+from core.fft_backend import get_fft_backend
+from core.feature_graph import FeatureContext, feature_plan
+from core.signal_utils import as_float
 
 
 class L1FeaturePipeline:
@@ -18,101 +15,161 @@ class L1FeaturePipeline:
     - Physically meaningful units
     - ISO / SCADA / FSM safe
     - Deterministic & auditable
+
+    One rfft per window: every band energy and the envelope are
+    derived from the same spectrum. Several points are computed
+    together with ``compute_batch`` (one batched FFT along axis 1).
+
+    Features are nodes of a lazy graph (core.feature_graph): each
+    declares what it needs (spectrum, envelope, velocity, ...), and
+    intermediates are computed once per window, only when asked for.
+    Extra features (kurtosis, skewness, order / bearing band RMS) are
+    opt-in per point and cost nothing for points that do not request
+    them. Order bands come from the row's PointProfile bin table.
+
+    dtype (float64 | float32) is the compute precision end to end:
+    FFT, envelope and velocity integration stay in that precision.
+
+    FFTs go through an FFTBackend (default: the process-wide backend
+    chosen by ``configure_fft_backend``).
     """
 
-    def __init__(self, fs: float, rpm: float):
+    # Hz bands (low, high)
+    HF_BAND = (3000, 10000)
+    LOW_BAND = (10, 100)
+    HIGH_BAND = (1000, 5000)
+
+    # name → band
+    BANDS = {
+        "hf": HF_BAND,
+        "low": LOW_BAND,
+        "high": HIGH_BAND,
+    }
+
+    # Always computed (SCADA / FSM schema)
+    CORE_FEATURES = (
+        "acc_rms_g",
+        "acc_peak_g",
+        "acc_hf_rms_g",
+        "crest_factor",
+        "envelope_rms",
+        "overall_vel_rms_mm_s",
+        "energy_low",
+        "energy_high",
+    )
+
+    def __init__(self, fs: float, rpm: float, dtype=np.float64, fft=None):
         self.fs = fs
         self.rpm = rpm
+        self.dtype = np.dtype(dtype)
+        self.fft = fft or get_fft_backend()
 
-    def compute(self, window):
+    @staticmethod
+    def validate_features(names):
+        """
+        Check a feature profile against the registry (incl. dependencies).
+        """
+        try:
+            feature_plan(names)
+        except KeyError as exc:
+            raise ValueError(f"Unknown L1 feature: {exc.args[0]}") from None
+        return tuple(names)
+
+    def compute(self, window, time_stats=None, extras=(), profile=None,
+                spectrum_sink=None):
         """
         window: np.ndarray
         Acceleration signal in g
+        time_stats: optional incremental time-domain features
+        (StreamingTimeStats.snapshot) replacing the full recompute
+        extras: optional feature names on top of CORE_FEATURES
+        profile: optional PointProfile (rpm-aware order bins)
+        spectrum_sink: optional callable(spectrum, envelope), see
+        compute_batch
         """
-        acc = np.asarray(window, dtype=float)
+        acc = as_float(window, self.dtype)
 
         # -----------------------------
         # BASIC SIGNAL GUARD
         # -----------------------------
         if acc.size == 0:
-            return self._zero_features()
-
-        # -----------------------------
-        # CORE ACC FEATURES
-        # -----------------------------
-        acc_rms = rms(acc)
-        acc_peak = peak_to_peak(acc) / 2.0
-
-        # -----------------------------
-        # HIGH-FREQUENCY RMS (BEARING)
-        # -----------------------------
-        hf_energy = bandpass_energy(
+            return self._zero_features(extras)
+
+        return self.compute_batch(
+            acc.reshape(1, -1),
+            time_stats=None if time_stats is None else [time_stats],
+            extras=[extras] if extras else None,
+            profiles=None if profile is None else [profile],
+            spectrum_sink=spectrum_sink,
+        )[0]
+
+    def compute_batch(self, windows, time_stats=None, extras=None,
+                      profiles=None, spectrum_sink=None):
+        """
+        windows: np.ndarray [n_points, n_samples]
+        Acceleration signals in g, one row per point.
+        time_stats: optional list (one per row) of incremental
+        time-domain features; RMS, peak, crest and velocity are then
+        taken from it instead of being recomputed over the window.
+        extras: optional list (one per row) of extra feature names.
+        profiles: optional list (one per row) of PointProfile.
+        spectrum_sink: optional callable receiving the batch's rfft
+        spectrum and envelope signal [rows, ...] (e.g. SpectralCache),
+        so downstream consumers do not redo the FFTs.
+
+        Returns one feature dict per row (same schema as ``compute``).
+        """
+        acc = as_float(windows, self.dtype)
+        if acc.ndim == 1:
+            acc = acc.reshape(1, -1)
+
+        n_points, n = acc.shape
+        if n == 0:
+            return [
+                self._zero_features(extras[i] if extras else ())
+                for i in range(n_points)
+            ]
+
+        ctx = FeatureContext(
+            self,
             acc,
-            self.fs,
-            low=3000,
-            high=10000,
+            time_stats=time_stats,
+            profiles=profiles,
         )
 
-        # Convert energy → RMS-like magnitude
-        acc_hf_rms = np.sqrt(hf_energy / acc.size) if hf_energy > 0 else 0.0
+        columns = {name: ctx[name] for name in self.CORE_FEATURES}
+        results = [
+            {name: float(values[i]) for name, values in columns.items()}
+            for i in range(n_points)
+        ]
 
-        # -----------------------------
-        # CREST FACTOR
-        # -----------------------------
-        crest_factor = acc_peak / acc_rms if acc_rms > 0 else 0.0
-
-        # -----------------------------
-        # ENVELOPE RMS (BEARING DEFECT)
-        # -----------------------------
-        envelope = np.abs(hilbert(acc))
-        envelope_rms = rms(envelope)
-
-        # -----------------------------
-        # VELOCITY RMS (ISO 10816 / 20816)
-        # acc[g] → m/s² → integrate → detrend → mm/s
-        # -----------------------------
-        acc_ms2 = acc * 9.80665
-        vel_m_s = np.cumsum(acc_ms2) / self.fs
-        vel_m_s = detrend(vel_m_s, type="constant")
-
-        overall_vel_rms_mm_s = rms(vel_m_s) * 1000.0
+        if spectrum_sink is not None:
+            spectrum_sink(ctx["spectrum"], ctx["envelope"])
 
         # -----------------------------
-        # SUPPORTING ENERGY FEATURES
+        # EXTRA FEATURES (PER-POINT PROFILES)
+        # rows sharing a profile are evaluated together
         # -----------------------------
-        energy_low = bandpass_energy(
-            acc,
-            self.fs,
-            low=10,
-            high=100,
-        )
+        if extras is not None:
+            groups = {}
+            for i, names in enumerate(extras):
+                if names:
+                    groups.setdefault(tuple(names), []).append(i)
 
-        energy_high = bandpass_energy(
-            acc,
-            self.fs,
-            low=1000,
-            high=5000,
-        )
+            for names, rows in groups.items():
+                sub = ctx if len(rows) == n_points else ctx.take(rows)
+                for name in names:
+                    values = sub[name]
+                    for j, i in enumerate(rows):
+                        results[i][name] = float(values[j])
 
-        return {
-            # --- SCADA / FSM ---
-            "acc_rms_g": float(acc_rms),
-            "acc_peak_g": float(acc_peak),
-            "acc_hf_rms_g": float(acc_hf_rms),
-            "crest_factor": float(crest_factor),
-            "envelope_rms": float(envelope_rms),
-            "overall_vel_rms_mm_s": float(overall_vel_rms_mm_s),
-
-            # --- ENGINEERING SUPPORT ---
-            "energy_low": float(energy_low),
-            "energy_high": float(energy_high),
-        }
+        return results
 
     # =============================
     # SAFE FALLBACK (NEVER NULL)
     # =============================
-    def _zero_features(self):
-        return {
+    def _zero_features(self, extras=()):
+        features = {
             "acc_rms_g": 0.0,
             "acc_peak_g": 0.0,
             "acc_hf_rms_g": 0.0,
@@ -122,5 +179,7 @@ class L1FeaturePipeline:
             "energy_low": 0.0,
             "energy_high": 0.0,
         }
+        features.update(dict.fromkeys(extras, 0.0))
+        return features
 
 
@@ -0,0 +1,89 @@
+import math
+
+
+# ==================================================
+# BEARING GEOMETRY PRESETS
+# n_balls, ball_d (mm), pitch_d (mm), contact_angle (deg)
+# Only verified data (bearing manufacturer's catalogue / nameplate);
+# no generic defaults — a wrong geometry yields wrong defect frequencies.
+# e.g. "<part no.>": {"n_balls": ..., "ball_d": ..., "pitch_d": ...,
+#                     "contact_angle": ...}
+# ==================================================
+BEARING_GEOMETRY = {}
+
+_GEOMETRY_KEYS = ("n_balls", "ball_d", "pitch_d")
+
+# Running-speed harmonics every point gets
+SHAFT_ORDERS = {"1x": 1.0, "2x": 2.0, "3x": 3.0}
+
+# Orders of bearing_defect_orders (envelope-spectrum diagnostics)
+BEARING_DEFECTS = ("ftf", "bpfo", "bpfi", "bsf")
+
+
+def bearing_geometry(bearing):
+    """
+    Preset name (BEARING_GEOMETRY) or explicit geometry dict → geometry dict.
+    """
+    if bearing is None:
+        return None
+    if isinstance(bearing, dict):
+        missing = [key for key in _GEOMETRY_KEYS if key not in bearing]
+        if missing:
+            raise ValueError(f"Bearing geometry missing {', '.join(missing)}")
+        return bearing
+    try:
+        return BEARING_GEOMETRY[str(bearing)]
+    except KeyError:
+        raise ValueError(
+            f"Unknown bearing preset: {bearing} (give the geometry instead)"
+        ) from None
+
+
+def bearing_defect_orders(n_balls, ball_d, pitch_d, contact_angle=0.0):
+    """
+    Bearing defect frequencies as multiples of shaft speed
+    (inner race rotating, outer race fixed).
+    """
+    ratio = ball_d / pitch_d * math.cos(math.radians(contact_angle))
+    return {
+        "ftf": 0.5 * (1.0 - ratio),
+        "bpfo": 0.5 * n_balls * (1.0 - ratio),
+        "bpfi": 0.5 * n_balls * (1.0 + ratio),
+        "bsf": pitch_d / (2.0 * ball_d) * (1.0 - ratio * ratio),
+    }
+
+
+def bearing_defect_frequencies(rpm, geometry):
+    """
+    {ftf, bpfo, bpfi, bsf} in Hz at the given shaft speed.
+    """
+    fr = rpm / 60.0
+    return {
+        name: order * fr
+        for name, order in bearing_defect_orders(**geometry).items()
+    }
+
+
+class MachineKinematics:
+    """
+    Characteristic frequencies of one measurement point, expressed as
+    orders (multiples of shaft speed) so they scale with the speed:
+    shaft harmonics always; gear mesh and bearing defects only when
+    gear_teeth / bearing are configured (nameplate data).
+    """
+
+    def __init__(self, machine_type=None, bearing=None, gear_teeth=None):
+        self.machine_type = machine_type
+        self.bearing = bearing_geometry(bearing)
+        self.gear_teeth = gear_teeth
+
+        orders = dict(SHAFT_ORDERS)
+        if gear_teeth:
+            orders["gmf"] = float(gear_teeth)
+        if self.bearing is not None:
+            orders.update(bearing_defect_orders(**self.bearing))
+        self.orders = orders
+
+    def frequencies(self, rpm):
+        fr = rpm / 60.0
+        return {name: order * fr for name, order in self.orders.items()}
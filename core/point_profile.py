@@ -0,0 +1,103 @@
+from core.machine_kinematics import MachineKinematics
+from core.signal_utils import band_bin_slice
+
+
+class PointProfile:
+    """
+    RPM-aware L1 profile of ONE point.
+
+    Holds the point's kinematics, extra features and the rfft bin
+    slices of its order bands (1x/2x/3x, gear mesh, bearing defects).
+    The bin table is rebuilt only when the reported speed moves more
+    than ``speed_tolerance`` (relative) from the speed it was built for,
+    so order features cost an index lookup per window.
+    """
+
+    # ±ORDER_HALF_WIDTH orders around each characteristic order
+    ORDER_HALF_WIDTH = 0.1
+
+    def __init__(self, name: str, fs: float, window_size: int, rpm: float,
+                 kinematics: MachineKinematics = None, extras=(),
+                 speed_tolerance: float = 0.02):
+        self.name = name
+        self.fs = fs
+        self.window_size = int(window_size)
+        self.kinematics = kinematics or MachineKinematics()
+        self.extras = tuple(extras)
+        self.speed_tolerance = speed_tolerance
+
+        self.rpm = None
+        self.bins = {}
+        self.rebuilds = 0
+        self._build(rpm)
+
+    def _build(self, rpm):
+        fr = rpm / 60.0
+        w = self.ORDER_HALF_WIDTH
+        self.bins = {
+            name: band_bin_slice(
+                self.window_size, self.fs, (order - w) * fr, (order + w) * fr
+            )
+            for name, order in self.kinematics.orders.items()
+        }
+        self.rpm = rpm
+        self.rebuilds += 1
+
+    def update_speed(self, rpm) -> bool:
+        """
+        Reported speed (rpm) → rebuild the bin table if it moved beyond
+        the tolerance. Missing / zero speed keeps the current table.
+        """
+        if not rpm or rpm <= 0:
+            return False
+        if abs(rpm - self.rpm) <= self.speed_tolerance * self.rpm:
+            return False
+        self._build(float(rpm))
+        return True
+
+
+def build_point_profile(name, spec, fs, window_size, rpm_default,
+                        extras=(), speed_tolerance=0.02):
+    """
+    spec: one entry of the points table (config/config.yaml), may be None
+    {type, rpm, bearing (preset or geometry), gear_teeth, features}
+    """
+    spec = spec or {}
+    kinematics = MachineKinematics(
+        machine_type=spec.get("type"),
+        bearing=spec.get("bearing"),
+        gear_teeth=spec.get("gear_teeth"),
+    )
+    return PointProfile(
+        name,
+        fs=fs,
+        window_size=window_size,
+        rpm=spec.get("rpm", rpm_default),
+        kinematics=kinematics,
+        extras=tuple(dict.fromkeys([*spec.get("features", ()), *extras])),
+        speed_tolerance=speed_tolerance,
+    )
+
+
+def normalize_extra_features(table):
+    """
+    l1_feature.extra_features {point | "asset:point": [names]} →
+    {key: (names, ...)}, keys lower-cased like the points table
+    """
+    return {
+        str(key).lower(): tuple(names or ())
+        for key, names in (table or {}).items()
+    }
+
+
+def extras_for(extra_features, asset_id, point):
+    """
+    extra_features: see normalize_extra_features
+    → extra feature names of asset:point (the asset:point entry wins
+    over the point entry), matched case-insensitively like the points
+    table
+    """
+    point = str(point).lower()
+    return extra_features.get(
+        f"{asset_id}:{point}".lower(), extra_features.get(point, ())
+    )
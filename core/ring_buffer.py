@@ -1,25 +1,207 @@
-from collections import deque
-import copy
+import numpy as np
+
+from core.streaming_stats import StreamingTimeStats
+
+
+class PointRingBuffer:
+    """
+    Preallocated sample buffer for ONE asset:point.
+
+    Samples are written linearly into a contiguous block of
+    ``window_size * capacity_factor`` samples. Only when the write head
+    reaches the end of the block are the newest ``window_size`` samples
+    moved back to the front, so the latest window is always a single
+    contiguous slice and never needs to be reassembled.
+
+    Window scheduling is hop based: a window is only ready once
+    ``hop_size`` new samples arrived since the last emitted window,
+    independent of how the sensor chunks its payloads.
+    """
+
+    def __init__(
+        self,
+        window_size: int,
+        hop_size: int = 1,
+        dtype=np.float64,
+        capacity_factor: int = 4,
+        stats: StreamingTimeStats | None = None,
+    ):
+        self.window_size = int(window_size)
+        self.stats = stats  # optional incremental time-domain stats
+        self.hop_size = min(max(int(hop_size), 1), self.window_size)
+        self.capacity = self.window_size * max(int(capacity_factor), 2)
+
+        self._buf = np.zeros(self.capacity, dtype=dtype)
+        self._head = 0      # next write position
+        self._filled = 0    # valid samples, capped at window_size
+        self._pending = 0   # new samples since last emitted window
+
+    @property
+    def dtype(self):
+        return self._buf.dtype
+
+    def extend(self, samples, scale=None):
+        """
+        Bulk append (list or ndarray) — no per-sample Python objects.
+        scale: g per count for integer samples (binary int16 frames);
+        the counts are scaled straight into the buffer.
+        """
+        if scale is None:
+            x = np.asarray(samples, dtype=self._buf.dtype).ravel()
+        else:
+            x = np.asarray(samples).ravel()
+        n = x.size
+        if n == 0:
+            return
+
+        size = self.window_size
+        self._pending += n
+
+        # Payload longer than a window → only the newest window survives
+        if n >= size:
+            self._write(0, x[-size:], scale)
+            self._head = size
+            self._filled = size
+            if self.stats is not None:
+                self.stats.update(self._buf[:size])
+            return
+
+        # Wrap: keep the newest window at the front of the block
+        if self._head + n > self.capacity:
+            keep = self._filled
+            self._buf[:keep] = self._buf[self._head - keep:self._head]
+            self._head = keep
+
+        self._write(self._head, x, scale)
+        self._head += n
+        self._filled = min(self._filled + n, size)
+
+        if self.stats is not None:
+            self.stats.update(self._buf[self._head - n:self._head])
+
+    def _write(self, start, x, scale):
+        dest = self._buf[start:start + x.size]
+        if scale is None:
+            dest[...] = x
+        else:
+            np.multiply(x, scale, out=dest, casting="unsafe")
+
+    def is_ready(self) -> bool:
+        return self._filled >= self.window_size and self._pending >= self.hop_size
+
+    def mark_emitted(self):
+        self._pending = 0
+
+    def window(self) -> np.ndarray:
+        """
+        Read-only, contiguous view on the newest window (zero-copy).
+        The view is only valid until the next ``extend``.
+        """
+        view = self._buf[self._head - self.window_size:self._head]
+        view.flags.writeable = False
+        return view
+
 
 class RingBufferManager:
-    def __init__(self, window_size=4096):
+    def __init__(
+        self,
+        window_size=4096,
+        hop_size=None,
+        overlap=None,
+        point_overrides=None,
+        dtype=np.float64,
+        streaming_stats=False,
+        fs=None,
+        stats_resync_every=256,
+    ):
+        """
+        hop_size        : new samples between two emitted windows
+        overlap         : alternative to hop_size (0.75 → hop = window / 4)
+        point_overrides : {"<point>" | "<asset>:<point>": {hop_size|overlap}},
+                          keys case-insensitive like the points table
+        streaming_stats : keep incremental RMS / peak / velocity per point
+                          (needs fs), see StreamingTimeStats
+
+        Without hop_size / overlap every message with new samples emits
+        a window (legacy behaviour).
+        """
         self.window_size = window_size
+        self.hop_size = self._resolve_hop(hop_size, overlap)
+        self.point_overrides = {
+            str(key).lower(): value
+            for key, value in (point_overrides or {}).items()
+        }
+        self.dtype = dtype
+        self.streaming_stats = streaming_stats
+        self.fs = fs
+        self.stats_resync_every = stats_resync_every
         self.buffers = {}
 
+    def _resolve_hop(self, hop_size, overlap):
+        if hop_size is not None:
+            return int(hop_size)
+        if overlap is not None:
+            return max(int(round(self.window_size * (1.0 - float(overlap)))), 1)
+        return 1
+
+    def _hop_for(self, asset, point):
+        override = (
+            self.point_overrides.get(self._key(asset, point).lower())
+            or self.point_overrides.get(str(point).lower())
+        )
+        if not override or (
+            "hop_size" not in override and "overlap" not in override
+        ):
+            return self.hop_size
+
+        return self._resolve_hop(override.get("hop_size"), override.get("overlap"))
+
     def _key(self, asset, point):
         return f"{asset}:{point}"
 
-    def append(self, asset, point, raw):
+    def _buffer(self, asset, point) -> PointRingBuffer:
         key = self._key(asset, point)
-        if key not in self.buffers:
-            self.buffers[key] = deque(maxlen=self.window_size)
+        buf = self.buffers.get(key)
+        if buf is None:
+            stats = (
+                StreamingTimeStats(
+                    self.window_size,
+                    self.fs,
+                    resync_every=self.stats_resync_every,
+                )
+                if self.streaming_stats
+                else None
+            )
+            buf = PointRingBuffer(
+                self.window_size,
+                hop_size=self._hop_for(asset, point),
+                dtype=self.dtype,
+                stats=stats,
+            )
+            self.buffers[key] = buf
+        return buf
 
-        self.buffers[key].extend(raw["acceleration"])
+    def append(self, asset, point, raw):
+        self._buffer(asset, point).extend(raw["acceleration"], raw.get("scale"))
 
     def is_window_ready(self, asset, point):
-        key = self._key(asset, point)
-        return key in self.buffers and len(self.buffers[key]) >= self.window_size
+        buf = self.buffers.get(self._key(asset, point))
+        return buf is not None and buf.is_ready()
 
     def get_window(self, asset, point):
-        key = self._key(asset, point)
-        return copy.deepcopy(list(self.buffers[key]))
+        """
+        Zero-copy read-only view; marks the window as emitted so the
+        next one is only ready after another hop. Callers that keep the
+        window beyond the current message (e.g. L2 jobs) must copy it.
+        """
+        buf = self.buffers[self._key(asset, point)]
+        buf.mark_emitted()
+        return buf.window()
+
+    def get_time_stats(self, asset, point):
+        """
+        Incremental time-domain features of the current window, or None
+        when streaming stats are disabled.
+        """
+        buf = self.buffers[self._key(asset, point)]
+        return buf.stats.snapshot() if buf.stats is not None else None
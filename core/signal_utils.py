@@ -1,11 +1,29 @@
+from functools import lru_cache
+
 import numpy as np
 
+from core.fft_backend import FFTBackend, get_fft_backend
+
+
+def as_float(signal, dtype=None):
+    """
+    Float view of a signal without forcing float64:
+    float32 / float64 input keeps its precision, anything else
+    (lists, ints) becomes ``dtype`` (default float64).
+    """
+    signal = np.asarray(signal)
+    if dtype is not None:
+        return signal.astype(dtype, copy=False)
+    if signal.dtype in (np.float32, np.float64):
+        return signal
+    return signal.astype(np.float64)
+
 
 def rms(signal):
     """
     Root Mean Square
     """
-    signal = np.asarray(signal, dtype=float)
+    signal = as_float(signal)
     return float(np.sqrt(np.mean(signal ** 2)))
 
 
@@ -13,7 +31,7 @@ def peak_to_peak(signal):
     """
     Peak-to-Peak amplitude
     """
-    signal = np.asarray(signal, dtype=float)
+    signal = as_float(signal)
     return float(np.max(signal) - np.min(signal))
 
 
@@ -24,15 +42,65 @@ def bandpass_energy(signal, fs, low, high):
     - Used for trend & relative comparison
     - NOT absolute vibration severity
     """
-    signal = np.asarray(signal, dtype=float)
+    signal = as_float(signal)
 
-    fft_vals = np.fft.rfft(signal)
-    freqs = np.fft.rfftfreq(len(signal), 1 / fs)
+    fft_vals = get_fft_backend().rfft(signal)
+    bins = band_bin_slice(len(signal), fs, low, high)
+
+    return band_energy_from_spectrum(fft_vals, bins)
+
+
+@lru_cache(maxsize=256)
+def band_bin_slice(n, fs, low, high):
+    """
+    rfft bin range [low, high] Hz for an n-sample window.
+    Bins are sorted by frequency, so the band mask is one contiguous
+    slice; cached per (n, fs, band).
+    """
+    freqs = FFTBackend.rfftfreq(n, fs)
+    start = int(np.searchsorted(freqs, low, side="left"))
+    stop = int(np.searchsorted(freqs, high, side="right"))
+    return slice(start, stop)
 
-    mask = (freqs >= low) & (freqs <= high)
-    energy = np.sum(np.abs(fft_vals[mask]) ** 2)
 
-    return float(energy)
+def band_energy_from_spectrum(spectrum, bins):
+    """
+    Band energy from an existing rfft spectrum (no extra FFT).
+    Works along the last axis: 1-D → float, 2-D (points x bins) → array.
+    """
+    band = spectrum[..., bins]
+    if band.ndim == 1:
+        return float(np.vdot(band, band).real)
+    return np.sum(band.real ** 2 + band.imag ** 2, axis=-1)
+
+
+@lru_cache(maxsize=32)
+def _analytic_weights(n, dtype=np.float64):
+    """
+    One-sided Hilbert weights on the rfft bins:
+    DC (and Nyquist for even n) x1, positive frequencies x2.
+    """
+    weights = np.full(n // 2 + 1, 2.0, dtype=dtype)
+    weights[0] = 1.0
+    if n % 2 == 0:
+        weights[-1] = 1.0
+    weights.flags.writeable = False
+    return weights
+
+
+def analytic_signal_from_spectrum(spectrum, n, fft=None):
+    """
+    Analytic signal (same as scipy.signal.hilbert) built from the rfft
+    spectrum of the window — costs one inverse FFT only.
+    Works along the last axis, so a 2-D spectrum gives one batched ifft.
+    fft: FFTBackend (default: process-wide backend)
+    """
+    full = np.zeros(
+        spectrum.shape[:-1] + (n,),
+        dtype=np.result_type(spectrum.dtype, np.complex64),
+    )
+    full[..., : n // 2 + 1] = spectrum * _analytic_weights(n, spectrum.real.dtype)
+    return (fft or get_fft_backend()).ifft(full, axis=-1)
 
 
 def velocity_rms_mm_s(acc_signal_g, fs):
@@ -48,7 +116,7 @@ def velocity_rms_mm_s(acc_signal_g, fs):
     Standard:
     - ISO 10816 / ISO 20816 compliant
     """
-    acc_signal_g = np.asarray(acc_signal_g, dtype=float)
+    acc_signal_g = as_float(acc_signal_g)
 
     # g → m/s²
     acc_m_s2 = acc_signal_g * 9.80665
@@ -0,0 +1,173 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.fft_backend import get_fft_backend
+
+
+class SpectrumEntry:
+    """
+    Spectra of ONE window of a point (float32, read-only):
+    amplitude spectrum (single-sided, g) and the envelope signal; the
+    envelope spectrum is derived from it on first use.
+    """
+
+    __slots__ = ("seq", "amplitude", "envelope", "_envelope_spectrum")
+
+    def __init__(self, seq, amplitude, envelope):
+        self.seq = seq
+        self.amplitude = amplitude
+        self.envelope = envelope
+        self._envelope_spectrum = None
+
+    @property
+    def nbytes(self):
+        size = self.amplitude.nbytes + self.envelope.nbytes
+        if self._envelope_spectrum is not None:
+            size += self._envelope_spectrum.nbytes
+        return size
+
+
+class SpectralCache:
+    """
+    Latest spectra per asset:point, shared by L1 (writer) and L2 /
+    on-demand readers.
+
+    L1 already computes the spectrum and the envelope of every window;
+    ``put_batch`` keeps them under a per-point window sequence number,
+    so a reader holding a seq gets exactly that window's spectra or a
+    miss (window superseded / evicted) — never a newer window by
+    accident. Points are evicted least-recently-used once the cache
+    exceeds ``max_bytes``.
+    """
+
+    def __init__(self, fs: float, max_bytes: int = 32 * 1024 * 1024):
+        self.fs = fs
+        self.max_bytes = int(max_bytes)
+
+        self._entries = OrderedDict()     # key → SpectrumEntry
+        self._seq = {}                    # key → last window seq
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # ---- COUNTERS ----
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.envelope_spectra = 0
+
+    # ==================================================
+    # WRITER (L1)
+    # ==================================================
+    def put_batch(self, keys, spectrum, envelope):
+        """
+        keys: (asset, point) per row, spectrum: complex rfft [rows, bins],
+        envelope: envelope signals [rows, n] → window seq per row
+        """
+        n = envelope.shape[1]
+        amplitude = (np.abs(spectrum) * (2.0 / n)).astype(np.float32)
+        envelope = envelope.astype(np.float32)
+
+        seqs = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                seq = self._seq.get(key, 0) + 1
+                self._seq[key] = seq
+                seqs.append(seq)
+
+                entry = SpectrumEntry(
+                    seq,
+                    _readonly(amplitude[i].copy()),
+                    _readonly(envelope[i].copy()),
+                )
+                self._replace(key, entry)
+            self._evict()
+        return seqs
+
+    def _replace(self, key, entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[key] = entry
+        self._bytes += entry.nbytes
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+            self.evictions += 1
+
+    # ==================================================
+    # READERS (L2, ON-DEMAND)
+    # ==================================================
+    def latest_seq(self, key):
+        with self._lock:
+            return self._seq.get(key)
+
+    def get(self, key, seq=None):
+        """
+        Entry of ``key`` (for window ``seq`` if given) or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (seq is not None and entry.seq != seq):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def envelope_spectrum(self, key, entry):
+        """
+        Single-sided amplitude spectrum of the (mean-removed) envelope,
+        computed once per window.
+        """
+        spectrum = entry._envelope_spectrum
+        if spectrum is not None:
+            return spectrum
+
+        env = entry.envelope.astype(np.float64)
+        env -= env.mean()
+        amplitude = np.abs(get_fft_backend().rfft(env)) * (2.0 / env.size)
+        spectrum = _readonly(amplitude.astype(np.float32))
+
+        with self._lock:
+            if entry._envelope_spectrum is None:
+                entry._envelope_spectrum = spectrum
+                self.envelope_spectra += 1
+                if self._entries.get(key) is entry:
+                    self._bytes += spectrum.nbytes
+                    self._evict()
+        return entry._envelope_spectrum
+
+    def spectra(self, key, seq=None):
+        """
+        → (amplitude, envelope_spectrum) of the window or (None, None)
+        """
+        entry = self.get(key, seq)
+        if entry is None:
+            return None, None
+        return entry.amplitude, self.envelope_spectrum(key, entry)
+
+    # ==================================================
+    # HEARTBEAT
+    # ==================================================
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "points": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "envelope_spectra": self.envelope_spectra,
+            }
+
+
+def _readonly(values):
+    values.flags.writeable = False
+    return values
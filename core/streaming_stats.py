@@ -0,0 +1,213 @@
+from collections import deque
+
+import numpy as np
+
+G = 9.80665
+
+
+class StreamingTimeStats:
+    """
+    Incremental time-domain statistics over a sliding window (ONE point).
+
+    Updated in O(hop) per message instead of O(window):
+    - running sum of squares            → acc RMS
+    - block-wise monotonic deques       → sliding max / min (peak)
+    - running velocity integral + sums  → velocity RMS (detrended)
+
+    Max / min use a monotonic deque over completed blocks of
+    ``block_size`` samples; only the partially covered block at the
+    window start is rescanned (≤ block_size samples, vectorized).
+
+    Every ``resync_every`` updates the sums are recomputed from the
+    stored window and the velocity integral is re-based to zero mean,
+    which bounds floating-point drift.
+    """
+
+    def __init__(self, window_size: int, fs: float, block_size: int = 64,
+                 resync_every: int = 256):
+        self.window_size = int(window_size)
+        self.fs = fs
+        self.block_size = max(1, min(int(block_size), self.window_size // 2))
+        self.resync_every = max(int(resync_every), 1)
+
+        # circular, indexed by absolute sample position % window_size
+        self._acc = np.zeros(self.window_size)
+        self._vel = np.zeros(self.window_size)
+        self._reset()
+
+    def _reset(self):
+        self._acc[:] = 0.0
+        self._vel[:] = 0.0
+
+        self._t = 0             # absolute samples seen
+        self._v_last = 0.0      # running velocity integral (m/s)
+
+        self._sum_sq = 0.0
+        self._sum_v = 0.0
+        self._sum_v2 = 0.0
+
+        self._max_blocks = deque()   # (block_index, max), decreasing
+        self._min_blocks = deque()   # (block_index, min), increasing
+        self._tail_max = -np.inf     # current incomplete block
+        self._tail_min = np.inf
+
+        self._updates = 0
+
+    # ==================================================
+    # UPDATE
+    # ==================================================
+    def update(self, samples):
+        """
+        samples: new acceleration samples in g (already scaled)
+        """
+        x = np.asarray(samples, dtype=np.float64).ravel()
+        n = x.size
+        if n == 0:
+            return
+
+        # A whole window (or more) at once → rebuild from scratch
+        if n >= self.window_size:
+            self._reset()
+            x = x[-self.window_size:]
+            n = x.size
+
+        vel = self._v_last + np.cumsum(x) * (G / self.fs)
+        self._v_last = float(vel[-1])
+
+        for sl_ring, sl_new in self._ring_slices(self._t, n):
+            old_acc = self._acc[sl_ring]
+            old_vel = self._vel[sl_ring]
+            new_vel = vel[sl_new]
+            new_acc = x[sl_new]
+
+            self._sum_sq += float(np.dot(new_acc, new_acc) - np.dot(old_acc, old_acc))
+            self._sum_v += float(np.sum(new_vel) - np.sum(old_vel))
+            self._sum_v2 += float(np.dot(new_vel, new_vel) - np.dot(old_vel, old_vel))
+
+            self._acc[sl_ring] = new_acc
+            self._vel[sl_ring] = new_vel
+
+        self._push_blocks(x)
+        self._t += n
+
+        self._updates += 1
+        if self._updates % self.resync_every == 0:
+            self.resync()
+
+    def _ring_slices(self, start, n):
+        """
+        Circular [start, start+n) → [(ring slice, source slice), ...]
+        """
+        pos = start % self.window_size
+        first = min(n, self.window_size - pos)
+        slices = [(slice(pos, pos + first), slice(0, first))]
+        if first < n:
+            slices.append((slice(0, n - first), slice(first, n)))
+        return slices
+
+    def _push_blocks(self, x):
+        B = self.block_size
+        t = self._t
+        i = 0
+        n = x.size
+
+        while i < n:
+            fill = (t + i) % B
+            take = min(B - fill, n - i)
+
+            # Whole blocks in one vectorized reduction
+            if fill == 0 and n - i >= B:
+                full = (n - i) // B
+                blocks = x[i:i + full * B].reshape(full, B)
+                first_block = (t + i) // B
+                for j, (bmax, bmin) in enumerate(
+                    zip(blocks.max(axis=1), blocks.min(axis=1))
+                ):
+                    self._close_block(first_block + j, float(bmax), float(bmin))
+                i += full * B
+                continue
+
+            seg = x[i:i + take]
+            self._tail_max = max(self._tail_max, float(seg.max()))
+            self._tail_min = min(self._tail_min, float(seg.min()))
+            i += take
+
+            if fill + take == B:
+                self._close_block((t + i - 1) // B, self._tail_max, self._tail_min)
+                self._tail_max = -np.inf
+                self._tail_min = np.inf
+
+    def _close_block(self, index, bmax, bmin):
+        while self._max_blocks and self._max_blocks[-1][1] <= bmax:
+            self._max_blocks.pop()
+        self._max_blocks.append((index, bmax))
+
+        while self._min_blocks and self._min_blocks[-1][1] >= bmin:
+            self._min_blocks.pop()
+        self._min_blocks.append((index, bmin))
+
+    # ==================================================
+    # QUERY
+    # ==================================================
+    def is_ready(self) -> bool:
+        return self._t >= self.window_size
+
+    def _extremes(self):
+        B = self.block_size
+        start = self._t - self.window_size
+
+        # Blocks starting before the window are only partially covered
+        first_full = -(-start // B)
+        while self._max_blocks and self._max_blocks[0][0] < first_full:
+            self._max_blocks.popleft()
+        while self._min_blocks and self._min_blocks[0][0] < first_full:
+            self._min_blocks.popleft()
+
+        vmax = self._tail_max
+        vmin = self._tail_min
+        if self._max_blocks:
+            vmax = max(vmax, self._max_blocks[0][1])
+            vmin = min(vmin, self._min_blocks[0][1])
+
+        head = min(first_full * B, self._t) - start
+        if head > 0:
+            for sl_ring, _ in self._ring_slices(start, head):
+                seg = self._acc[sl_ring]
+                vmax = max(vmax, float(seg.max()))
+                vmin = min(vmin, float(seg.min()))
+
+        return vmax, vmin
+
+    def snapshot(self) -> dict:
+        """
+        Time-domain L1 features of the current window (same keys and
+        units as L1FeaturePipeline).
+        """
+        n = self.window_size
+        vmax, vmin = self._extremes()
+
+        acc_rms = np.sqrt(max(self._sum_sq, 0.0) / n)
+        acc_peak = (vmax - vmin) / 2.0
+
+        mean_v = self._sum_v / n
+        var_v = max(self._sum_v2 / n - mean_v * mean_v, 0.0)
+
+        return {
+            "acc_rms_g": float(acc_rms),
+            "acc_peak_g": float(acc_peak),
+            "crest_factor": float(acc_peak / acc_rms) if acc_rms > 0 else 0.0,
+            "overall_vel_rms_mm_s": float(np.sqrt(var_v) * 1000.0),
+        }
+
+    # ==================================================
+    # RE-SYNC (DRIFT BOUND)
+    # ==================================================
+    def resync(self):
+        # Velocity RMS is detrended → re-basing the integral is free
+        offset = float(np.mean(self._vel)) if self.is_ready() else 0.0
+        self._vel -= offset
+        self._v_last -= offset
+
+        self._sum_sq = float(np.dot(self._acc, self._acc))
+        self._sum_v = float(np.sum(self._vel))
+        self._sum_v2 = float(np.dot(self._vel, self._vel))
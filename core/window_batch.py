@@ -0,0 +1,60 @@
+import time
+
+import numpy as np
+
+
+class WindowBatch:
+    """
+    Collects ready windows of several points over a short tick into one
+    preallocated (max_points, window_size) block, so L1 runs once per
+    tick via ``L1FeaturePipeline.compute_batch``.
+
+    Each window is copied into its row on ``add`` (ring buffer views are
+    reused on the next message). The block returned by ``drain`` is only
+    valid until the next ``add``.
+    """
+
+    def __init__(self, window_size, max_points=16, tick_sec=0.05, dtype=np.float64):
+        self.max_points = max(int(max_points), 1)
+        self.tick_sec = tick_sec
+
+        self._block = np.zeros((self.max_points, window_size), dtype=dtype)
+        self._meta = []
+        self._first_ts = None
+
+    def __len__(self):
+        return len(self._meta)
+
+    def add(self, window, meta):
+        """
+        window: 1-D array (window_size,)
+        meta  : caller context returned with the row on drain
+        """
+        row = len(self._meta)
+        self._block[row] = window
+        self._meta.append(meta)
+
+        if self._first_ts is None:
+            self._first_ts = time.monotonic()
+
+    def is_full(self) -> bool:
+        return len(self._meta) >= self.max_points
+
+    def is_due(self) -> bool:
+        if not self._meta:
+            return False
+        if self.is_full():
+            return True
+        return time.monotonic() - self._first_ts >= self.tick_sec
+
+    def drain(self):
+        """
+        Returns (windows[k, window_size], [meta, ...]) and resets.
+        """
+        count = len(self._meta)
+        meta = self._meta
+
+        self._meta = []
+        self._first_ts = None
+
+        return self._block[:count], meta
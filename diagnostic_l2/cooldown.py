@@ -1,36 +1,42 @@
+import math
 import time
 
+from early_fault.state_store import PointStateStore
+
 
 class L2CooldownManager:
     """
     Mengontrol kapan L2 diagnostic boleh ditrigger.
     Asset & point scoped.
+
+    Last trigger time per point: PointStateStore.l2_last_trigger (NaN = never).
     """
 
-    def __init__(self, warning_sec: int, alarm_sec: int):
+    def __init__(self, warning_sec: int, alarm_sec: int,
+                 store: PointStateStore = None):
         self.warning_sec = warning_sec
         self.alarm_sec = alarm_sec
-        self.last_trigger = {}  # key -> timestamp
-
-    def _key(self, asset, point):
-        return f"{asset}:{point}"
+        self.store = store if store is not None else PointStateStore(())
 
     def can_trigger(self, asset, point, state: str) -> bool:
         now = time.time()
-        key = self._key(asset, point)
 
         cooldown = self._cooldown_for_state(state)
         if cooldown is None:
             return False
 
-        last = self.last_trigger.get(key)
-        if last is None:
+        slot = self.store.slot(asset, point)
+        with self.store.lock:
+            last = float(self.store.l2_last_trigger[slot])
+        if math.isnan(last):
             return True
 
         return (now - last) >= cooldown
 
     def mark_triggered(self, asset, point):
-        self.last_trigger[self._key(asset, point)] = time.time()
+        slot = self.store.slot(asset, point)
+        with self.store.lock:
+            self.store.l2_last_trigger[slot] = time.time()
 
     def _cooldown_for_state(self, state: str):
         if state == "WARNING":
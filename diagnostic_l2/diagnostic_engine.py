@@ -1,26 +1,79 @@
 # diagnostic_l2/diagnostic_engine.py
 
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from diagnostic_l2.envelope_analysis import (
+    DefectBinTable,
+    defect_peaks,
+    envelope_spectrum,
+)
+from diagnostic_l2.fault_rules import RuleBook
+
+DEFECT_FAULTS = {
+    "bpfo": "BEARING_OUTER_RACE",
+    "bpfi": "BEARING_INNER_RACE",
+    "bsf": "BEARING_ROLLING_ELEMENT",
+    "ftf": "BEARING_CAGE",
+}
+
 
 class DiagnosticEngine:
+    """
+    L2 diagnosis of one alarmed window.
+
+    - bearing defects: envelope spectrum (cached from L1 or computed
+      once, decimated) checked at BPFO / BPFI / BSF / FTF and their
+      harmonics through a per-point DefectBinTable (cached per speed)
+    - fault rules (RuleBook: YAML, hot-reloaded): one vectorized
+      predicate pass over the L1 features + defect peak ratios
+    - ISO 20816 zone C on overall velocity
+
+    Long-lived: one instance per worker thread pool / process.
+    """
+
+    HARMONICS = 3
+    PEAK_RATIO = 3.0          # fundamental peak / envelope-spectrum floor
+    HARMONIC_RATIO = 2.0      # a harmonic counts above this ratio
+    MIN_HARMONICS = 2         # incl. the fundamental
+    ISO_ZONE_C = 7.1          # mm/s
+    MAX_TABLES = 256
+
+    def __init__(self, rulebook: RuleBook = None):
+        self.rulebook = rulebook or RuleBook()
+        self._tables = OrderedDict()
+        self._tables_lock = threading.Lock()   # shared by L2 threads
+
     def run(self, l1_snapshot):
         rules_triggered = []
         metrics = {}
 
-        features = l1_snapshot.get("features", {})
+        features = dict(l1_snapshot.get("features", {}))
 
-        vel = features.get("overall_vel_rms_mm_s")
-        env = features.get("envelope_rms")
+        # === ENVELOPE SPECTRUM (BEARING DEFECTS) ===
+        # strongest peak ratio first → it labels the fault
+        defects = self._bearing_defects(l1_snapshot)
+        for name, ratio, harmonics in sorted(defects, key=lambda d: -d[1]):
+            features[f"{name}_ratio"] = ratio
+            if ratio >= self.PEAK_RATIO and harmonics >= self.MIN_HARMONICS:
+                rules_triggered.append(f"ENVELOPE_{name.upper()}_PEAK")
+                metrics[f"{name}_ratio"] = round(ratio, 2)
 
-        # === RULES ===
-        if vel is not None and vel > 7.1:
+        # === ISO 20816 ===
+        vel = features.get("overall_vel_rms_mm_s")
+        if vel is not None and vel > self.ISO_ZONE_C:
             rules_triggered.append("ISO_20816_ZONE_C")
             metrics["overall_vel_rms_mm_s"] = vel
 
-        if env is not None and env > 0.35:
-            rules_triggered.append("ENVELOPE_BPFI_PEAK")
-            metrics["envelope_rms"] = env
+        # === FAULT RULES (compiled predicates, most severe first) ===
+        matches = self.rulebook.current().matches(features)
+        for match in matches:
+            rules_triggered.append(f"RULE_{match['fault_type']}")
+            metrics.update(match["evidence"])
 
-        fault_type = self._classify_fault(rules_triggered)
+        fault_type = self._classify_fault(rules_triggered, matches)
 
         return {
             "fault_type": fault_type,
@@ -30,16 +83,65 @@ class DiagnosticEngine:
             "metrics": metrics,
         }
 
+    # =========================
+    # BEARING DEFECTS
+    # =========================
+    def _bearing_defects(self, l1_snapshot):
+        """
+        → [(defect, fundamental peak ratio, harmonics found)]
+        (empty without bearing kinematics or signal)
+        """
+        kinematics = l1_snapshot.get("kinematics") or {}
+        orders = kinematics.get("orders")
+        window = l1_snapshot.get("window")
+        if not orders or not kinematics.get("rpm") or window is None:
+            return []
+
+        table = self._table(len(window), kinematics["fs"], kinematics["rpm"], orders)
+
+        amplitude = l1_snapshot.get("envelope_spectrum")
+        if amplitude is None:
+            amplitude = envelope_spectrum(window, table.decimation)
+
+        ratios, _ = defect_peaks(amplitude, table)
+        found = np.sum(ratios >= self.HARMONIC_RATIO, axis=1)
+        return [
+            (name, float(ratios[d, 0]), int(found[d]))
+            for d, name in enumerate(table.defects)
+        ]
+
+    def _table(self, n, fs, rpm, orders):
+        key = (int(n), float(fs), round(float(rpm), 1), tuple(sorted(orders.items())))
+        with self._tables_lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        table = DefectBinTable(n, fs, rpm, orders, harmonics=self.HARMONICS)
+        with self._tables_lock:
+            self._tables[key] = table
+            self._tables.move_to_end(key)
+            if len(self._tables) > self.MAX_TABLES:
+                self._tables.popitem(last=False)
+        return table
+
     # =========================
     # INTERNAL HELPERS (LOCKED)
     # =========================
 
-    def _classify_fault(self, rules_triggered):
+    def _classify_fault(self, rules_triggered, matches=()):
         """
-        Decide fault type based on triggered rules
+        Decide fault type: spectral bearing defect with the strongest
+        peak ratio, then the most severe matching FAULT_RULE, then ISO
+        severity
         """
-        if "ENVELOPE_BPFI_PEAK" in rules_triggered:
-            return "BEARING_OUTER_RACE"
+        for rule in rules_triggered:
+            if rule.startswith("ENVELOPE_"):
+                return DEFECT_FAULTS[rule.split("_")[1].lower()]
+
+        if matches:
+            return matches[0]["fault_type"]
 
         if "ISO_20816_ZONE_C" in rules_triggered:
             return "MECHANICAL_SEVERITY_HIGH"
@@ -64,4 +166,3 @@ class DiagnosticEngine:
             return None
 
         return max(metrics, key=lambda k: metrics[k])
-
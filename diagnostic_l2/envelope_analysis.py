@@ -0,0 +1,80 @@
+import numpy as np
+
+from core.fft_backend import get_fft_backend
+from core.signal_utils import analytic_signal_from_spectrum
+
+
+class DefectBinTable:
+    """
+    Envelope-spectrum bin indices of the bearing defect frequencies of
+    ONE point at one speed: idx [defects, harmonics, width].
+
+    Each harmonic h·f gets ±max(1, tolerance·h·f / df) bins (speed
+    uncertainty grows with the harmonic); rows are padded with their
+    centre bin so the peak search is one gather + max.
+    ``decimation`` is the envelope decimation that still covers the
+    highest harmonic (resolution df = fs / n is kept).
+    """
+
+    def __init__(self, n, fs, rpm, orders, harmonics=3, tolerance=0.01):
+        self.n = int(n)
+        self.fs = float(fs)
+        self.rpm = float(rpm)
+        self.defects = tuple(orders)
+        self.frequencies = np.array(
+            [orders[name] * rpm / 60.0 for name in self.defects]
+        )
+
+        df = self.fs / self.n
+        h = np.arange(1, harmonics + 1)
+        centre = self.frequencies[:, None] * h[None, :] / df        # [D, H]
+        half = np.maximum(1, np.ceil(tolerance * centre)).astype(np.int64)
+
+        width = 2 * int(half.max()) + 1
+        offsets = np.arange(width) - width // 2
+        idx = np.rint(centre).astype(np.int64)[:, :, None] + offsets
+        idx = np.where(np.abs(offsets) <= half[:, :, None], idx,
+                       np.rint(centre).astype(np.int64)[:, :, None])
+
+        # decimation: keep bins up to 1.25 × the highest harmonic
+        self.max_bin = int(idx.max()) + 1
+        q = 1
+        while self.n % (4 * q) == 0 and self.n // (4 * q) > 1.25 * self.max_bin:
+            q *= 2
+        self.decimation = q
+        self.bins = self.n // (2 * q) + 1
+
+        self.idx = np.clip(idx, 1, self.bins - 1)
+
+
+def envelope_spectrum(window, decimation=1, fft=None):
+    """
+    Single-sided amplitude spectrum of the (mean-removed) envelope of a
+    window, with the envelope block-averaged by ``decimation`` first
+    (same resolution fs / n, fewer bins).
+    """
+    fft = fft or get_fft_backend()
+    x = np.asarray(window, dtype=np.float64)
+    n = x.size
+
+    envelope = np.abs(analytic_signal_from_spectrum(fft.rfft(x), n, fft))
+    if decimation > 1:
+        envelope = envelope[: n - n % decimation].reshape(-1, decimation).mean(axis=1)
+    envelope = envelope - envelope.mean()
+    return np.abs(fft.rfft(envelope)) * (2.0 / envelope.size)
+
+
+def defect_peaks(amplitude, table: DefectBinTable):
+    """
+    amplitude: envelope spectrum (full or decimated, same df)
+    → (peaks [defects, harmonics] / noise floor, noise floor)
+    The floor is the median amplitude up to the highest searched bin.
+    """
+    stop = min(table.bins, amplitude.size)
+    band = amplitude[1:stop]
+    floor = float(np.median(band)) if band.size else 0.0
+    peaks = amplitude[np.minimum(table.idx, stop - 1)].max(axis=2)
+    if floor <= 0.0:
+        return np.zeros_like(peaks), floor
+    return peaks / floor, floor
+
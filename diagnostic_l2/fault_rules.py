@@ -1,37 +1,254 @@
 # diagnostic_l2/fault_rules.py
 
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from config.config_loader import load_rules
+
+log = logging.getLogger(__name__)
+
+# Built-in rule table (used when no rules file is configured / found).
+# conditions: feature → (operator, threshold); all must hold.
+# Thresholds match config/fault_rules.yaml (sources listed there).
 FAULT_RULES = [
     {
         "fault_type": "BEARING_DEGRADATION",
         "conditions": {
-            "acc_hf_rms_g": ">",
-            "envelope_rms": ">",
+            "acc_hf_rms_g": (">", 0.12),
+            "envelope_rms": (">", 0.35),
         },
         "severity": "ALARM",
     },
     {
         "fault_type": "IMBALANCE",
         "conditions": {
-            "overall_vel_rms_mm_s": ">",
-            "crest_factor": "<",
+            "overall_vel_rms_mm_s": (">", 4.5),
+            "crest_factor": ("<", 3.0),
         },
         "severity": "WARNING",
     },
     {
         "fault_type": "MISALIGNMENT",
         "conditions": {
-            "overall_vel_rms_mm_s": ">",
-            "acc_peak_g": ">",
+            "overall_vel_rms_mm_s": (">", 4.5),
+            "acc_peak_g": (">", 2.0),
         },
         "severity": "WARNING",
     },
     {
         "fault_type": "LOOSENESS",
         "conditions": {
-            "crest_factor": ">",
+            "crest_factor": (">", 6.0),
         },
         "severity": "ALARM",
     },
 ]
 
+OPERATORS = (">", ">=", "<", "<=", "==")
+_SEVERITY_RANK = {"WARNING": 1, "ALARM": 2}
+
+# "[feature] <op> <threshold>", spaces optional ("> 0.12", ">0.12",
+# "rms>0.12"); != cannot be expressed as bounds → rejected below
+_CONDITION = re.compile(r"^\s*(?:([A-Za-z_]\w*)\s*)?(>=|<=|==|!=|>|<)\s*(.+?)\s*$")
+
+
+def parse_condition(condition, feature=None):
+    """
+    (">", 0.12) | [">", 0.12] | "> 0.12" | ">0.12" | "<feature> > 0.12"
+    → (operator, threshold). A feature name inside the string must
+    match ``feature`` (the condition's key) when given.
+    """
+    if isinstance(condition, str):
+        match = _CONDITION.match(condition)
+        if match is None:
+            raise ValueError(f"Invalid condition {condition!r}")
+        name, op, value = match.groups()
+        if name is not None and feature is not None and name != feature:
+            raise ValueError(f"Condition {condition!r} names another feature")
+        condition = (op, value)
+    op, threshold = condition
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown operator {op!r}")
+    return op, float(threshold)
+
+
+class CompiledRules:
+    """
+    Rule table as a predicate matrix over [rules, features]:
+    lower / upper bounds (± inf where a rule does not constrain the
+    feature) with inclusive flags. One feature vector [features] or a
+    batch [k, features] is evaluated in a single broadcast comparison;
+    a missing feature (NaN) fails every condition on it.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.fault_types = [rule["fault_type"] for rule in self.rules]
+        self.severities = [rule.get("severity", "WARNING") for rule in self.rules]
+        self.severity = np.array(
+            [_SEVERITY_RANK.get(severity, 0) for severity in self.severities]
+        )
+
+        parsed = []
+        features = {}
+        for rule in self.rules:
+            if not rule.get("conditions"):
+                raise ValueError(f"Rule {rule['fault_type']} has no conditions")
+            try:
+                conditions = {
+                    feature: parse_condition(condition, feature)
+                    for feature, condition in rule["conditions"].items()
+                }
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"Rule {rule['fault_type']}: {exc}") from None
+            for feature in conditions:
+                features.setdefault(feature, len(features))
+            parsed.append(conditions)
+
+        self.features = tuple(features)
+        self.feature_index = features
+
+        shape = (len(self.rules), len(self.features))
+        self.lower = np.full(shape, -np.inf)
+        self.upper = np.full(shape, np.inf)
+        self.lower_inclusive = np.zeros(shape, dtype=bool)
+        self.upper_inclusive = np.zeros(shape, dtype=bool)
+        self.constrained = np.zeros(shape, dtype=bool)
+
+        for r, conditions in enumerate(parsed):
+            for feature, (op, threshold) in conditions.items():
+                f = features[feature]
+                self.constrained[r, f] = True
+                if op in (">", ">=", "=="):
+                    self.lower[r, f] = max(self.lower[r, f], threshold)
+                    self.lower_inclusive[r, f] = op != ">"
+                if op in ("<", "<=", "=="):
+                    self.upper[r, f] = min(self.upper[r, f], threshold)
+                    self.upper_inclusive[r, f] = op != "<"
+
+    def vector(self, features: dict) -> np.ndarray:
+        """
+        {feature: value} → [features] in rule order (missing → NaN)
+        """
+        return np.array(
+            [features.get(name, np.nan) for name in self.features],
+            dtype=np.float64,
+        )
+
+    def matrix(self, rows) -> np.ndarray:
+        """
+        [{feature: value}, ...] → [k, features]
+        """
+        return np.array([self.vector(features) for features in rows]).reshape(
+            len(rows), len(self.features)
+        )
+
+    def evaluate(self, x) -> np.ndarray:
+        """
+        x: [features] or [k, features] → bool [rules] or [k, rules]
+        """
+        x = np.asarray(x, dtype=np.float64)
+        single = x.ndim == 1
+        x = np.atleast_2d(x)[:, None, :]                     # [k, 1, F]
+
+        with np.errstate(invalid="ignore"):
+            above = np.where(self.lower_inclusive, x >= self.lower, x > self.lower)
+            below = np.where(self.upper_inclusive, x <= self.upper, x < self.upper)
+        held = (above & below) | ~self.constrained           # [k, R, F]
+        hits = held.all(axis=2)
+
+        return hits[0] if single else hits
+
+    def matches(self, features: dict) -> list:
+        """
+        Matched rules of one point, most severe first:
+        [{"fault_type", "severity", "evidence": {feature: value}}]
+        """
+        return self.matches_batch([features])[0]
+
+    def matches_batch(self, rows) -> list:
+        """
+        One ``matches`` list per row, all rows in one evaluation.
+        """
+        hits = self.evaluate(self.matrix(rows))
+        order = np.argsort(-self.severity, kind="stable")
+
+        results = []
+        for features, row in zip(rows, hits):
+            results.append([
+                {
+                    "fault_type": self.fault_types[r],
+                    "severity": self.severities[r],
+                    "evidence": {
+                        self.features[f]: features[self.features[f]]
+                        for f in np.flatnonzero(self.constrained[r])
+                    },
+                }
+                for r in order
+                if row[r]
+            ])
+        return results
+
+
+def compile_rules(rules=None) -> CompiledRules:
+    return CompiledRules(FAULT_RULES if rules is None else rules)
+
+
+class RuleBook:
+    """
+    Compiled rules from a YAML file (config/fault_rules.yaml), reloaded
+    without a restart: ``current()`` re-reads the file when its mtime
+    changed (checked at most every ``reload_sec``). A file that fails
+    to parse / compile is logged and the previous rules stay active.
+    Without a file the built-in FAULT_RULES are used.
+    """
+
+    def __init__(self, path: str = None, reload_sec: float = 5.0):
+        self.path = path
+        self.reload_sec = reload_sec
+        self.reloads = 0
+
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self._compiled = compile_rules()
+        self._load(force=True)
+
+    def current(self) -> CompiledRules:
+        if self.path is not None and self.reload_sec is not None:
+            now = time.monotonic()
+            if now - self._checked >= self.reload_sec:
+                self._load()
+        return self._compiled
+
+    def _load(self, force=False):
+        with self._lock:
+            self._checked = time.monotonic()
+            if self.path is None:
+                return
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                if force:
+                    log.warning("[L2] Rules file %s not found — built-in rules",
+                                self.path)
+                return
+            if not force and mtime == self._mtime:
+                return
+            self._mtime = mtime
+
+            try:
+                compiled = compile_rules(load_rules(self.path))
+            except (ValueError, KeyError, TypeError, AttributeError) as exc:
+                log.error("[L2] Rules %s not loaded: %s", self.path, exc)
+                return
 
+            self._compiled = compiled
+            self.reloads += 1
+            log.info("[L2] %d fault rules loaded from %s",
+                     len(compiled.rules), self.path)
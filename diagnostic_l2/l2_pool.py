@@ -0,0 +1,166 @@
+import logging
+import multiprocessing as mp
+import queue
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from diagnostic_l2.worker import l2_worker
+
+log = logging.getLogger(__name__)
+
+
+class L2ProcessPool:
+    """
+    L2 diagnostics in long-lived worker processes.
+
+    Each process builds its DiagnosticEngine once (initializer) and
+    attaches to one shared-memory block holding, per slot, a window
+    [window_size], the L1 feature vector [features] and the cached
+    amplitude / envelope spectra [2, bins]. A job only pickles its slot
+    index and the small event metadata; the payload comes back to this
+    process, which publishes it.
+
+    ``run`` is called from the scheduler threads (L2JobQueue); there are
+    never more concurrent jobs than slots, so a slot is always free.
+    """
+
+    def __init__(self, workers: int, window_size: int, features,
+                 dtype=np.float64, rules=(None, None)):
+        """
+        rules: (rules_file, reload_sec) of each worker's RuleBook
+        """
+        self.workers = max(int(workers), 1)
+        self.window_size = int(window_size)
+        self.features = tuple(features)
+        self.dtype = np.dtype(dtype)
+
+        self.shm = shared_memory.SharedMemory(
+            create=True,
+            size=_block_size(
+                self.workers, self.window_size, len(self.features), self.dtype
+            ),
+        )
+        self.windows, self.values, self.spectra = _views(
+            self.shm, self.workers, self.window_size, len(self.features),
+            self.dtype,
+        )
+
+        self._free = queue.Queue()
+        for slot in range(self.workers):
+            self._free.put(slot)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                self.shm.name, self.workers, self.window_size, self.features,
+                self.dtype.str, tuple(rules),
+            ),
+        )
+
+    def run(self, job: dict) -> dict:
+        slot = self._free.get()
+        try:
+            window = np.asarray(job["window"], dtype=self.dtype)
+            n = min(window.size, self.window_size)
+            self.windows[slot, :n] = window[:n]
+
+            l1_features = job.get("l1_features", {})
+            self.values[slot] = [
+                l1_features.get(name, np.nan) for name in self.features
+            ]
+
+            meta = {
+                key: value
+                for key, value in job.items()
+                if key not in _SHARED_KEYS
+            }
+            meta["has_spectra"] = job.get("spectrum") is not None
+            if meta["has_spectra"]:
+                self.spectra[slot, 0] = job["spectrum"]
+                self.spectra[slot, 1] = job["envelope_spectrum"]
+
+            return self._executor.submit(_run_job, slot, n, meta).result()
+        finally:
+            self._free.put(slot)
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        del self.windows, self.values, self.spectra
+        self.shm.close()
+        self.shm.unlink()
+
+
+_SHARED_KEYS = ("window", "l1_features", "spectrum", "envelope_spectrum")
+
+
+def _block_size(slots, window_size, n_features, dtype):
+    bins = window_size // 2 + 1
+    return (
+        slots * window_size * np.dtype(dtype).itemsize
+        + slots * n_features * 8
+        + slots * 2 * bins * 4
+    )
+
+
+def _views(shm, slots, window_size, n_features, dtype):
+    windows = np.ndarray((slots, window_size), dtype=dtype, buffer=shm.buf)
+    values = np.ndarray(
+        (slots, n_features),
+        dtype=np.float64,
+        buffer=shm.buf,
+        offset=windows.nbytes,
+    )
+    spectra = np.ndarray(
+        (slots, 2, window_size // 2 + 1),
+        dtype=np.float32,
+        buffer=shm.buf,
+        offset=windows.nbytes + values.nbytes,
+    )
+    return windows, values, spectra
+
+
+# ==================================================
+# WORKER PROCESS SIDE
+# ==================================================
+_WORKER = {}
+
+
+def _init_worker(shm_name, slots, window_size, features, dtype, rules):
+    from diagnostic_l2.diagnostic_engine import DiagnosticEngine
+    from diagnostic_l2.fault_rules import RuleBook
+
+    # Ctrl+C / SIGTERM are handled by the parent (pool shutdown)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    windows, values, spectra = _views(
+        shm, slots, window_size, len(features), np.dtype(dtype)
+    )
+    _WORKER.update(
+        shm=shm,
+        windows=windows,
+        values=values,
+        spectra=spectra,
+        features=features,
+        engine=DiagnosticEngine(RuleBook(*rules)),
+    )
+
+
+def _run_job(slot, n, meta):
+    values = _WORKER["values"][slot]
+    job = dict(meta)
+    job["window"] = _WORKER["windows"][slot, :n]
+    job["l1_features"] = {
+        name: float(value)
+        for name, value in zip(_WORKER["features"], values)
+        if not np.isnan(value)
+    }
+    if job.pop("has_spectra", False):
+        job["spectrum"] = _WORKER["spectra"][slot, 0]
+        job["envelope_spectrum"] = _WORKER["spectra"][slot, 1]
+    return l2_worker(job, engine=_WORKER["engine"])
@@ -1,45 +1,242 @@
-import queue
-import threading
+import heapq
+import itertools
 import logging
+import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# higher runs first; unknown / NORMAL → 0
+SEVERITY = {"WARNING": 1, "ALARM": 2}
+
+
+class _PendingJob:
+    __slots__ = ("key", "job", "severity", "enqueued_ts", "seq")
+
+    def __init__(self, key, job, severity, enqueued_ts, seq):
+        self.key = key
+        self.job = job
+        self.severity = severity
+        self.enqueued_ts = enqueued_ts
+        self.seq = seq
+
+
 class L2JobQueue:
-    def __init__(self, maxsize=10):
-        self.queue = queue.Queue(maxsize=maxsize)
-        self._worker_thread = None
+    """
+    Priority + coalescing scheduler for L2 diagnostics.
+
+    - order   : severity (ALARM before WARNING), then age
+    - coalesce: a new job for an asset:point that is still pending
+                replaces it (latest window), keeping its age and the
+                higher severity
+    - full    : the lowest-priority pending job is dropped; a new job
+                never evicts one of equal or higher severity
+    - workers : worker_fn runs on the scheduler threads and its result
+                goes to on_result; for process execution worker_fn is
+                L2ProcessPool.run (the thread waits on the process)
+
+    Worker threads scale between min_workers and max_workers with the
+    pending depth (one per ``jobs_per_worker``) and retire after
+    ``idle_sec`` without work.
+    """
+
+    def __init__(self, maxsize=32, min_workers=1, max_workers=None,
+                 jobs_per_worker=2, idle_sec=30.0):
+        self.maxsize = max(int(maxsize), 1)
+        self.min_workers = max(int(min_workers), 1)
+        if not max_workers:
+            max_workers = max(1, min(4, (os.cpu_count() or 2) // 2))
+        self.max_workers = max(int(max_workers), self.min_workers)
+        self.jobs_per_worker = max(int(jobs_per_worker), 1)
+        self.idle_sec = idle_sec
+
+        self._heap = []           # (-severity, enqueued_ts, seq, key)
+        self._pending = {}        # key → _PendingJob
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+        self._worker_fn = None
+        self._on_result = None
+        self._threads = set()
+        self._busy = 0
         self._running = False
 
-    def start(self, worker_fn):
-        if self._worker_thread:
+        # ---- COUNTERS ----
+        self.enqueued_count = 0
+        self.coalesced_count = 0
+        self.completed_count = 0
+        self.failed_count = 0
+        self.dropped = {name: 0 for name in SEVERITY}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    def start(self, worker_fn, on_result=None):
+        if self._running:
             return
 
-        self._running = True
+        self._worker_fn = worker_fn
+        self._on_result = on_result
+        with self._cond:
+            self._running = True
+            self._scale()
+
+    # ==================================================
+    # PRODUCER SIDE
+    # ==================================================
+    def enqueue(self, job: dict, severity: str = None) -> bool:
+        key = f"{job['asset']}:{job['point']}"
+        if severity is None:
+            severity = job.get("health_event", {}).get("state")
+        level = SEVERITY.get(severity, 0)
+
+        with self._cond:
+            self.enqueued_count += 1
 
-        def _run():
-            while self._running:
-                try:
-                    job = self.queue.get()
-                    worker_fn(job)
-                except Exception:
-                    logger.exception("L2 worker failed")
-                finally:
-                    self.queue.task_done()
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.job = job
+                self.coalesced_count += 1
+                if level > pending.severity:
+                    pending.severity = level
+                    self._push(pending)
+                return True
 
-        self._worker_thread = threading.Thread(
-            target=_run, daemon=True
+            if len(self._pending) >= self.maxsize:
+                victim = min(
+                    self._pending.values(),
+                    key=lambda p: (p.severity, -p.enqueued_ts),
+                )
+                if victim.severity >= level:
+                    self._count_drop(level)
+                    logger.warning("L2 queue full — %s job dropped (%s)",
+                                   severity, key)
+                    return False
+
+                del self._pending[victim.key]
+                self._count_drop(victim.severity)
+                logger.warning("L2 queue full — evicted %s", victim.key)
+
+            pending = _PendingJob(key, job, level, time.time(), None)
+            self._pending[key] = pending
+            self._push(pending)
+
+            self._scale()
+            self._cond.notify()
+        return True
+
+    def _push(self, pending):
+        # the old heap entry (if any) goes stale: its seq no longer matches
+        pending.seq = next(self._seq)
+        heapq.heappush(
+            self._heap,
+            (-pending.severity, pending.enqueued_ts, pending.seq, pending.key),
         )
-        self._worker_thread.start()
-            
-    def enqueue(self, job: dict) -> bool:
-        try:
-            self.queue.put(job, block=False)
-            return True
-        except queue.Full:
-            logger.warning("L2 queue full — job dropped")
-            return False
+
+    def _pop(self):
+        while self._heap:
+            _, _, seq, key = heapq.heappop(self._heap)
+            pending = self._pending.get(key)
+            if pending is not None and pending.seq == seq:
+                del self._pending[key]
+                return pending
+        return None
+
+    def _count_drop(self, level):
+        for name, value in SEVERITY.items():
+            if value == level:
+                self.dropped[name] += 1
+
+    # ==================================================
+    # WORKER POOL
+    # ==================================================
+    def _scale(self):
+        """
+        Start threads up to the depth-derived target (lock held).
+        """
+        if not self._running:
+            return
+
+        waiting = len(self._pending) + self._busy
+        target = -(-waiting // self.jobs_per_worker)
+        target = min(max(target, self.min_workers), self.max_workers)
+
+        while len(self._threads) < target:
+            t = threading.Thread(
+                target=self._run,
+                name=f"l2-worker-{next(self._seq)}",
+                daemon=True,
+            )
+            self._threads.add(t)
+            t.start()
+
+    def _run(self):
+        me = threading.current_thread()
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    idle = not self._cond.wait(self.idle_sec)
+                    if idle and len(self._threads) > self.min_workers:
+                        self._threads.discard(me)
+                        return
+                if not self._running:
+                    self._threads.discard(me)
+                    return
+
+                pending = self._pop()
+                if pending is None:
+                    continue
+                self._busy += 1
+
+            started = time.time()
+            ok = True
+            try:
+                result = self._worker_fn(pending.job)
+                if self._on_result is not None:
+                    self._on_result(pending.job, result)
+            except Exception:
+                ok = False
+                logger.exception("L2 worker failed | %s", pending.key)
+            finally:
+                self._record(ok, started - pending.enqueued_ts,
+                             time.time() - started)
+
+    def _record(self, ok, wait, run):
+        with self._cond:
+            self._busy -= 1
+            if ok:
+                self.completed_count += 1
+            else:
+                self.failed_count += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._run_total += run
+            self._run_max = max(self._run_max, run)
 
     def stop(self):
-        self._running = False
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
 
- 
\ No newline at end of file
+    # ==================================================
+    # HEARTBEAT
+    # ==================================================
+    def stats(self) -> dict:
+        with self._cond:
+            done = max(self.completed_count + self.failed_count, 1)
+            return {
+                "workers": len(self._threads),
+                "busy": self._busy,
+                "depth": len(self._pending),
+                "enqueued": self.enqueued_count,
+                "coalesced": self.coalesced_count,
+                "completed": self.completed_count,
+                "failed": self.failed_count,
+                "dropped": dict(self.dropped),
+                "wait_ms_avg": round(self._wait_total / done * 1000, 1),
+                "wait_ms_max": round(self._wait_max * 1000, 1),
+                "run_ms_avg": round(self._run_total / done * 1000, 1),
+                "run_ms_max": round(self._run_max * 1000, 1),
+            }
@@ -1,16 +1,51 @@
+import logging
 import time
-import traceback
 from diagnostic_l2.diagnostic_engine import DiagnosticEngine
 
+logger = logging.getLogger(__name__)
 
-def l2_worker(job):
-    engine = DiagnosticEngine()
+
+# fallback engine (built-in rules) when the caller passes none;
+# PointProcessor / L2ProcessPool hand in their long-lived engines
+_ENGINE = None
+
+
+def _default_engine():
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = DiagnosticEngine()
+    return _ENGINE
+
+
+def l1_snapshot(job) -> dict:
+    """
+    Engine input of a job: L1 features + the window that triggered it
+    (+ its cached amplitude / envelope spectra, None on a cache miss,
+    and the point's bearing kinematics {fs, rpm, orders}).
+    """
+    return {
+        "features": job.get("l1_features", {}),
+        "window": job.get("window"),
+        "spectrum": job.get("spectrum"),
+        "envelope_spectrum": job.get("envelope_spectrum"),
+        "kinematics": job.get("kinematics"),
+        "early_fault_event": job.get("early_fault_event", {}),
+        "health_event": job.get("health_event", {}),
+    }
+
+
+def l2_worker(job, engine=None):
+    """
+    Run one L2 job → l2_result payload (published by the caller, so
+    this also runs in a process pool).
+    """
+    engine = engine or _default_engine()
 
     try:
         # === SINGLE SOURCE OF INPUT ===
-        l1_snapshot = job["l1_snapshot"]
+        snapshot = l1_snapshot(job)
 
-        result = engine.run(l1_snapshot)
+        result = engine.run(snapshot)
 
         payload = {
             "asset": job["asset"],
@@ -30,15 +65,12 @@ def l2_worker(job):
             "timestamp": time.time(),
         }
 
-        job["publisher"].publish_l2_result(
-            job["asset"],
-            job["point"],
-            payload,
-        )
+        return payload
 
     except Exception:
-        print("❌ L2 worker failed")
-        traceback.print_exc()
+        logger.exception(
+            "L2 worker failed | %s:%s", job.get("asset"), job.get("point")
+        )
 
         fail_payload = {
             "asset": job["asset"],
@@ -49,8 +81,4 @@ def l2_worker(job):
             "timestamp": time.time(),
         }
 
-        job["publisher"].publish_l2_result(
-            job["asset"],
-            job["point"],
-            fail_payload,
-        )
+        return fail_payload
@@ -1,62 +1,292 @@
-import math
-from collections import defaultdict
+import numpy as np
+
+from core.l1_feature_pipeline import L1FeaturePipeline
+from early_fault.quantile_sketch import p2_estimate, p2_update
+from early_fault.state_store import PointStateStore, unique_waves
+
+# robust sketches per feature: median, MAD (median |x - median|), p95
+ROBUST_QUANTILES = (("median", 0.5), ("mad", 0.5), ("p95", 0.95))
+MAD_TO_STD = 1.4826
 
 
 class AdaptiveBaseline:
     """
     Adaptive baseline per asset + point + feature
     Using EWMA with gated learning.
+
+    State lives in the PointStateStore columns
+    baseline_mean / baseline_var [slot, feature], baseline_count [slot];
+    only the store's features are tracked. ``update_and_score`` scores
+    and learns a whole batch in one pass.
+
+    robust_features: features scored against streaming quantiles
+    instead of the EWMA — (x - median) / (1.4826 * MAD) — so impacts
+    and short outliers do not drag the reference. Each series keeps
+    three P² sketches (median, MAD, p95) of 5 markers each in
+    robust_q / robust_n [slot, feature, 3, 5]: O(1) per window, a few
+    hundred bytes per point × feature. The sketches cover every learned
+    window (no forgetting), unlike the EWMA.
     """
 
-    def __init__(self, alpha: float = 0.01, min_samples: int = 100):
+    def __init__(self, alpha: float = 0.01, min_samples: int = 100,
+                 store: PointStateStore = None, learn_z: float = 3.0,
+                 gate_features=("acc_hf_rms_g",), warmup_max: dict = None,
+                 robust_features=()):
         self.alpha = alpha
         self.min_samples = min_samples
+        if store is None:
+            store = PointStateStore(L1FeaturePipeline.CORE_FEATURES)
+        self.store = store
 
-        self._mean = defaultdict(float)
-        self._var = defaultdict(float)
-        self._count = defaultdict(int)
+        # learning gate on gate_features: z ≤ learn_z once ready,
+        # absolute warmup_max limits before that
+        self.learn_z = learn_z
+        self._gate_columns = [
+            store.feature_index[name]
+            for name in gate_features
+            if name in store.feature_index
+        ]
+        self._warmup_limits = [
+            (store.feature_index[name], limit)
+            for name, limit in (warmup_max or {}).items()
+            if name in store.feature_index
+        ]
 
-    def _key(self, asset, point, feature):
-        return f"{asset}:{point}:{feature}"
+        self.robust_features = tuple(
+            name for name in robust_features if name in store.feature_index
+        )
+        self._robust_columns = np.array(
+            [store.feature_index[name] for name in self.robust_features],
+            dtype=np.int64,
+        )
+        if self.robust_features:
+            shape = (len(self.robust_features), len(ROBUST_QUANTILES), 5)
+            store.add_column("robust_q", np.float64, shape=shape, group="robust")
+            store.add_column("robust_n", np.float64, shape=shape, group="robust")
+            store.add_column("robust_count", np.int64, group="robust")
 
     def update(self, asset, point, features: dict, allow_update: bool):
         """
         Update baseline only if allow_update == True
         """
-        for name, value in features.items():
-            key = self._key(asset, point, name)
+        slot = self.store.slot(asset, point)
+        self.update_batch(
+            np.array([slot]),
+            self.store.feature_matrix([features]),
+            np.array([allow_update]),
+        )
+
+    def update_batch(self, slots, values, allow_update):
+        """
+        slots: [k] store slots, values: [k, features],
+        allow_update: [k] bool gate
+        """
+        store = self.store
+        alpha = self.alpha
 
-            if not allow_update:
-                continue
+        with store.lock:
+            for rows in unique_waves(slots):
+                rows = rows[np.asarray(allow_update)[rows]]
+                if rows.size == 0:
+                    continue
 
-            self._count[key] += 1
+                s = slots[rows]
+                x = values[rows]
 
-            if self._count[key] == 1:
-                self._mean[key] = value
-                self._var[key] = 0.0
-                continue
+                count = store.baseline_count[s] + 1
+                store.baseline_count[s] = count
 
-            delta = value - self._mean[key]
-            self._mean[key] += self.alpha * delta
-            self._var[key] = (1 - self.alpha) * (
-                self._var[key] + self.alpha * delta * delta
-            )
+                mean = store.baseline_mean[s]
+                delta = x - mean
+                var = (1 - alpha) * (store.baseline_var[s] + alpha * delta * delta)
+                mean = mean + alpha * delta
+
+                first = count == 1
+                mean[first] = x[first]
+                var[first] = 0.0
+
+                store.baseline_mean[s] = mean
+                store.baseline_var[s] = var
+
+                if self.robust_features:
+                    self._update_robust(s, x[:, self._robust_columns])
+
+    def _update_robust(self, slots, x):
+        """
+        Feed one window per slot into the median / MAD / p95 sketches.
+        """
+        store = self.store
+        k, r = x.shape
+
+        count = store.robust_count[slots] + 1
+        store.robust_count[slots] = count
+        count = np.repeat(count, r)
+
+        q = store.robust_q[slots]                 # [k, R, 3, 5]
+        n = store.robust_n[slots]
+        flat = x.reshape(-1)
+
+        median_q, median_n = q[:, :, 0].reshape(-1, 5), n[:, :, 0].reshape(-1, 5)
+        p2_update(median_q, median_n, count, flat, 0.5)
+        median = p2_estimate(median_q, count, 0.5)
+
+        samples = {
+            "median": flat,
+            "mad": np.abs(flat - median),
+            "p95": flat,
+        }
+        sketches = [(median_q, median_n)]
+        for j, (name, p) in enumerate(ROBUST_QUANTILES[1:], start=1):
+            qj, nj = q[:, :, j].reshape(-1, 5), n[:, :, j].reshape(-1, 5)
+            p2_update(qj, nj, count, samples[name], p)
+            sketches.append((qj, nj))
+
+        for j, (qj, nj) in enumerate(sketches):
+            q[:, :, j] = qj.reshape(k, r, 5)
+            n[:, :, j] = nj.reshape(k, r, 5)
+
+        store.robust_q[slots] = q
+        store.robust_n[slots] = n
+
+    def _robust_estimates(self, slots):
+        """
+        → {"median", "mad", "p95"}: [k, robust features] each
+        """
+        store = self.store
+        q = store.robust_q[slots]
+        k, r = q.shape[:2]
+        count = np.repeat(store.robust_count[slots], r)
+
+        return {
+            name: p2_estimate(q[:, :, j].reshape(-1, 5), count, p).reshape(k, r)
+            for j, (name, p) in enumerate(ROBUST_QUANTILES)
+        }
+
+    # ==================================================
+    # SCORING
+    # ==================================================
+    def update_and_score(self, slots, values, allow_update=None):
+        """
+        One vectorized step for a batch of windows:
+        z-scores of every feature against the baseline *before* the
+        window, then gated learning.
+
+        allow_update: optional [k] bool gate; default = learn_mask()
+        (baseline ready → gate features' z ≤ learn_z, warm-up → warmup_max).
+        Returns BaselineScore (z, mean, std, ready) per row.
+        """
+        k = len(slots)
+        n_features = values.shape[1]
+        score = BaselineScore(
+            z=np.zeros((k, n_features)),
+            mean=np.zeros((k, n_features)),
+            std=np.ones((k, n_features)),
+            ready=np.zeros(k, dtype=bool),
+        )
+
+        with self.store.lock:
+            # a point twice in one batch is scored after its first update
+            for rows in unique_waves(slots):
+                part = self.score_batch(slots[rows], values[rows])
+                score.assign(rows, part)
+
+                gate = (
+                    self.learn_mask(part, values[rows])
+                    if allow_update is None
+                    else np.asarray(allow_update)[rows]
+                )
+                self.update_batch(slots[rows], values[rows], gate)
+
+        return score
+
+    def learn_mask(self, score, values):
+        """
+        Learn only from windows that look normal: against the baseline
+        once it is ready, against absolute warm-up limits before that.
+        """
+        learn = np.all(score.z[:, self._gate_columns] <= self.learn_z, axis=1)
+
+        warmup = np.ones(len(values), dtype=bool)
+        for column, limit in self._warmup_limits:
+            warmup &= values[:, column] < limit
+
+        return np.where(score.ready, learn, warmup)
+
+    def score_batch(self, slots, values):
+        """
+        [k, features] → BaselineScore (z = 0.0 until min_samples)
+        """
+        store = self.store
+        with store.lock:
+            mean = store.baseline_mean[slots]
+            var = store.baseline_var[slots]
+            ready = store.baseline_count[slots] >= self.min_samples
+            if self.robust_features:
+                ready &= store.robust_count[slots] >= self.min_samples
+                robust = self._robust_estimates(slots)
+
+        std = np.where(var > 0, np.sqrt(np.maximum(var, 0.0)), 1e-6)
+        if self.robust_features:
+            scale = MAD_TO_STD * robust["mad"]
+            mean[:, self._robust_columns] = robust["median"]
+            std[:, self._robust_columns] = np.where(scale > 0, scale, 1e-6)
+
+        z = (values - mean) / std
+        z[~ready] = 0.0
+        return BaselineScore(z=z, mean=mean, std=std, ready=ready)
+
+    def quantiles(self, asset, point) -> dict:
+        """
+        {robust feature: {"median", "mad", "p95"}} of one point
+        """
+        slot = self.store.slot(asset, point)
+        if not self.robust_features:
+            return {}
+
+        with self.store.lock:
+            estimates = self._robust_estimates(np.array([slot]))
+
+        return {
+            feature: {
+                name: float(values[0, i]) for name, values in estimates.items()
+            }
+            for i, feature in enumerate(self.robust_features)
+        }
 
     def normalize(self, asset, point, features: dict) -> dict:
         """
         Return normalized (z-score-like) features
         """
-        normalized = {}
+        slot = self.store.slot(asset, point)
+        z = self.score_batch(
+            np.array([slot]), self.store.feature_matrix([features])
+        ).z[0]
+
+        index = self.store.feature_index
+        return {
+            name: float(z[index[name]]) if name in index else 0.0
+            for name in features
+        }
 
-        for name, value in features.items():
-            key = self._key(asset, point, name)
-            count = self._count.get(key, 0)
 
-            if count < self.min_samples:
-                normalized[name] = 0.0
-                continue
+class BaselineScore:
+    """
+    Baseline deviation of a batch: z / mean / std [rows, features]
+    (store feature order), ready [rows]. For robust features mean / std
+    hold the median and 1.4826 * MAD.
+    """
+
+    def __init__(self, z, mean, std, ready):
+        self.z = z
+        self.mean = mean
+        self.std = std
+        self.ready = ready
 
-            std = math.sqrt(self._var[key]) if self._var[key] > 0 else 1e-6
-            normalized[name] = (value - self._mean[key]) / std
+    def assign(self, rows, other):
+        self.z[rows] = other.z
+        self.mean[rows] = other.mean
+        self.std[rows] = other.std
+        self.ready[rows] = other.ready
 
-        return normalized
+    def zscores(self, i, features) -> dict:
+        return {name: float(self.z[i, j]) for j, name in enumerate(features)}
@@ -1,14 +1,32 @@
+import numpy as np
+
+from early_fault.state_store import PointStateStore, unique_waves
+
+
 class PersistenceChecker:
-    def __init__(self):
-        self._counter = {}
+    def __init__(self, store: PointStateStore = None):
+        self.store = store if store is not None else PointStateStore(())
 
     def update(self, asset, point, trend):
-        key = (asset, point)
+        slot = self.store.slot(asset, point)
+        counter = self.update_batch(
+            np.array([slot]), np.array([trend.level != "NORMAL"])
+        )
+        return int(counter[0])
 
-        if trend.level != "NORMAL":
-            self._counter[key] = self._counter.get(key, 0) + 1
-        else:
-            self._counter[key] = 0
+    def update_batch(self, slots, abnormal):
+        """
+        Consecutive non-NORMAL windows per point.
+        slots: [k] store slots, abnormal: [k] bool
+        """
+        store = self.store
+        counter = np.zeros(len(slots), dtype=np.int64)
 
-        return self._counter[key]
+        with store.lock:
+            for rows in unique_waves(slots):
+                s = slots[rows]
+                value = np.where(abnormal[rows], store.persistence[s] + 1, 0)
+                store.persistence[s] = value
+                counter[rows] = value
 
+        return counter
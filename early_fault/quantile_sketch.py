@@ -0,0 +1,103 @@
+import warnings
+
+import numpy as np
+
+MARKERS = 5
+
+
+def p2_update(q, n, count, x, p):
+    """
+    P² streaming quantile (Jain & Chlamtac), vectorized over series.
+
+    q: [m, 5] marker heights, n: [m, 5] marker positions (1-based),
+    count: [m] observations *including* x, x: [m] new observation,
+    p: quantile in (0, 1). Updates q / n in place.
+
+    The first five observations are kept as-is in q (count ≤ 5); from
+    then on every update is O(1) with 5 markers per series.
+    """
+    warm = count <= MARKERS
+    if np.any(warm):
+        rows = np.flatnonzero(warm)
+        q[rows, count[rows] - 1] = x[rows]
+        init = rows[count[rows] == MARKERS]
+        if init.size:
+            q[init] = np.sort(q[init], axis=1)
+            n[init] = np.arange(1, MARKERS + 1)
+
+    rows = np.flatnonzero(~warm)
+    if rows.size == 0:
+        return
+
+    qs = q[rows]
+    ns = n[rows]
+    xs = x[rows]
+    N = count[rows].astype(np.float64)
+
+    # cell k of the new observation; extremes replace the end markers
+    low = xs < qs[:, 0]
+    high = xs >= qs[:, 4]
+    qs[low, 0] = xs[low]
+    qs[high, 4] = xs[high]
+    k = np.where(
+        low, 0, np.where(high, 3, np.sum(xs[:, None] >= qs[:, 1:4], axis=1))
+    )
+
+    ns += np.arange(MARKERS)[None, :] > k[:, None]
+
+    desired = np.stack(
+        [
+            np.ones_like(N),
+            1 + (N - 1) * p / 2,
+            1 + (N - 1) * p,
+            1 + (N - 1) * (1 + p) / 2,
+            N,
+        ],
+        axis=1,
+    )
+
+    for i in (1, 2, 3):
+        d = desired[:, i] - ns[:, i]
+        right = ns[:, i + 1] - ns[:, i]
+        left = ns[:, i - 1] - ns[:, i]
+        move = ((d >= 1) & (right > 1)) | ((d <= -1) & (left < -1))
+        if not np.any(move):
+            continue
+
+        s = np.sign(d)
+        qi, ql, qr = qs[:, i], qs[:, i - 1], qs[:, i + 1]
+        ni, nl, nr = ns[:, i], ns[:, i - 1], ns[:, i + 1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            parabolic = qi + s / (nr - nl) * (
+                (ni - nl + s) * (qr - qi) / (nr - ni)
+                + (nr - ni - s) * (qi - ql) / (ni - nl)
+            )
+            linear = np.where(
+                s > 0, qi + (qr - qi) / (nr - ni), qi - (ql - qi) / (nl - ni)
+            )
+
+        ok = (ql < parabolic) & (parabolic < qr)
+        qs[:, i] = np.where(move, np.where(ok, parabolic, linear), qi)
+        ns[:, i] = np.where(move, ni + s, ni)
+
+    q[rows] = qs
+    n[rows] = ns
+
+
+def p2_estimate(q, count, p):
+    """
+    Current quantile estimate per series ([m]); exact over the stored
+    observations while count < 5, NaN with no data.
+    """
+    estimate = q[:, 2].copy()
+    warm = count < MARKERS
+    if np.any(warm):
+        stored = q[warm].copy()
+        mask = np.arange(MARKERS)[None, :] >= count[warm][:, None]
+        stored[mask] = np.nan
+        with warnings.catch_warnings():
+            # all-NaN rows (no data yet) → NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            estimate[warm] = np.nanquantile(stored, p, axis=1)
+    return estimate
@@ -1,6 +1,18 @@
 import time
 from enum import Enum
 
+import numpy as np
+
+from early_fault.state_store import (
+    PointStateStore,
+    unique_waves,
+    STATE_NORMAL,
+    STATE_WATCH,
+    STATE_WARNING,
+    STATE_ALARM,
+)
+from early_fault.trend_detector import TrendBatch, TREND_LEVELS, VELOCITY_ZONES
+
 
 class EarlyFaultState(Enum):
     NORMAL = "NORMAL"
@@ -9,6 +21,14 @@ class EarlyFaultState(Enum):
     ALARM = "ALARM"
 
 
+# integer code (PointStateStore.fsm_state) → state
+FSM_STATES = list(EarlyFaultState)
+STATE_SCORES = np.array([0.2, 0.5, 0.75, 1.0])
+
+ZONE_C = VELOCITY_ZONES.index("C")
+ZONE_D = VELOCITY_ZONES.index("D")
+
+
 class EarlyFaultResult:
     def __init__(self, state, confidence, dominant_feature=None):
         self.state = state
@@ -31,109 +51,121 @@ class EarlyFaultFSM:
         warning_persistence=5,
         alarm_persistence=8,
         hysteresis_clear=3,
+        store: PointStateStore = None,
     ):
         self.watch_persistence = watch_persistence
         self.warning_persistence = warning_persistence
         self.alarm_persistence = alarm_persistence
         self.hysteresis_clear = hysteresis_clear
 
-        self._state = {}
-        self._clear_counter = {}
+        self.store = store if store is not None else PointStateStore(())
 
     def update(self, asset, point, trend, persistence):
-        key = (asset, point)
-        state = self._state.get(key, EarlyFaultState.NORMAL)
-
-        clear = self._clear_counter.get(key, 0)
+        slot = self.store.slot(asset, point)
+        batch = TrendBatch(
+            level=np.array([TREND_LEVELS.index(trend.level)]),
+            score=np.array([trend.score]),
+            hf_high=np.array([trend.hf_high]),
+            envelope_high=np.array([trend.envelope_high]),
+            velocity_zone=np.array([VELOCITY_ZONES.index(trend.velocity_zone)]),
+            temperature_alarm=np.array([trend.temperature_alarm]),
+            dominant_feature=[trend.dominant_feature],
+        )
+        return self.update_batch(np.array([slot]), batch, np.array([persistence]))[0]
+
+    def update_batch(self, slots, trend: TrendBatch, persistence):
+        """
+        Vectorized FSM step for a batch of points.
+        slots: [k] store slots, persistence: [k] counters
+        """
+        store = self.store
+        k = len(slots)
+        states = np.zeros(k, dtype=np.int8)
+
+        hf_high = trend.hf_high
+        envelope_high = trend.envelope_high
+        zone = trend.velocity_zone
+        confirmed = hf_high & envelope_high
 
         # =========================
         # CRITICAL OVERRIDES (L3)
         # =========================
-        if trend.temperature_alarm:
-            state = EarlyFaultState.ALARM
-
-        elif trend.velocity_zone == "D":
-            state = EarlyFaultState.ALARM
-
-        elif (
-            trend.hf_high
-            and trend.envelope_high
-            and persistence >= self.alarm_persistence
-        ):
-            state = EarlyFaultState.ALARM
+        alarm = (
+            trend.temperature_alarm
+            | (zone == ZONE_D)
+            | (confirmed & (persistence >= self.alarm_persistence))
+        )
 
         # =========================
         # WARNING (L2)
         # =========================
-        elif (
-            trend.hf_high
-            and trend.envelope_high
-            and persistence >= self.warning_persistence
-        ):
-            state = EarlyFaultState.WARNING
-
-        elif trend.velocity_zone == "C":
-            state = EarlyFaultState.WARNING
+        warning = ~alarm & (
+            (confirmed & (persistence >= self.warning_persistence))
+            | (zone == ZONE_C)
+        )
 
         # =========================
         # WATCH (L1)
         # =========================
-        elif trend.hf_high and persistence >= self.watch_persistence:
-            state = EarlyFaultState.WATCH
+        watch = ~alarm & ~warning & hf_high & (persistence >= self.watch_persistence)
 
         # =========================
         # CLEAR / DOWNGRADE
         # =========================
-        elif trend.level == "NORMAL":
-            clear += 1
-            if clear >= self.hysteresis_clear:
-                state = self._downgrade(state)
-                clear = 0
-
-        else:
-            clear = 0
-
-        self._state[key] = state
-        self._clear_counter[key] = clear
+        other = ~(alarm | warning | watch)
+        clearing = other & (trend.level == 0)
+        resetting = other & (trend.level != 0)
+
+        with store.lock:
+            for rows in unique_waves(slots):
+                s = slots[rows]
+                state = store.fsm_state[s]
+                clear = store.fsm_clear[s]
+
+                clear = np.where(clearing[rows], clear + 1, clear)
+                clear = np.where(resetting[rows], 0, clear)
+
+                downgrade = clearing[rows] & (clear >= self.hysteresis_clear)
+                state = np.where(downgrade, np.maximum(state - 1, STATE_NORMAL), state)
+                clear = np.where(downgrade, 0, clear)
+
+                state = np.select(
+                    [alarm[rows], warning[rows], watch[rows]],
+                    [STATE_ALARM, STATE_WARNING, STATE_WATCH],
+                    default=state,
+                ).astype(np.int8)
+
+                store.fsm_state[s] = state
+                store.fsm_clear[s] = clear
+                states[rows] = state
+
+        confidence = self._estimate_confidence(trend, persistence, states)
+
+        return [
+            EarlyFaultResult(
+                state=FSM_STATES[states[i]],
+                confidence=confidence[i],
+                dominant_feature=trend.dominant_feature[i],
+            )
+            for i in range(k)
+        ]
+
+    def _estimate_confidence(self, trend, persistence, states):
+        severity_score = np.select(
+            [trend.velocity_zone >= ZONE_C, trend.envelope_high, trend.hf_high],
+            [1.0, 0.7, 0.4],
+            default=0.0,
+        )
 
-        confidence = self._estimate_confidence(trend, persistence, state)
+        persistence_score = np.minimum(1.0, persistence / self.alarm_persistence)
 
-        return EarlyFaultResult(
-            state=state,
-            confidence=confidence,
-            dominant_feature=trend.dominant_feature,
-        )
+        state_score = STATE_SCORES[states]
 
-    def _downgrade(self, state):
-        if state == EarlyFaultState.ALARM:
-            return EarlyFaultState.WARNING
-        if state == EarlyFaultState.WARNING:
-            return EarlyFaultState.WATCH
-        return EarlyFaultState.NORMAL
-
-    def _estimate_confidence(self, trend, persistence, state):
-        severity_score = 0.0
-        if trend.velocity_zone in ("C", "D"):
-            severity_score = 1.0
-        elif trend.envelope_high:
-            severity_score = 0.7
-        elif trend.hf_high:
-            severity_score = 0.4
-
-        persistence_score = min(1.0, persistence / self.alarm_persistence)
-
-        state_score = {
-            EarlyFaultState.NORMAL: 0.2,
-            EarlyFaultState.WATCH: 0.5,
-            EarlyFaultState.WARNING: 0.75,
-            EarlyFaultState.ALARM: 1.0,
-        }[state]
-
-        confidence = (
+        confidence = np.minimum(
+            1.0,
             0.4 * severity_score +
             0.4 * persistence_score +
-            0.2 * state_score
+            0.2 * state_score,
         )
 
-        return round(min(1.0, confidence), 2)
-
+        return [round(float(c), 2) for c in confidence]
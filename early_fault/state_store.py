@@ -0,0 +1,180 @@
+import threading
+
+import numpy as np
+
+
+# FSM states as integers (EarlyFaultState order)
+STATE_NORMAL = 0
+STATE_WATCH = 1
+STATE_WARNING = 2
+STATE_ALARM = 3
+
+
+class PointStateStore:
+    """
+    Central per-point runtime state (struct of arrays).
+
+    Every asset:point gets an integer slot on first use; state lives in
+    NumPy columns indexed by slot (and by feature for per-feature state),
+    so trend / baseline / persistence / FSM / cooldown updates for a
+    batch of points are plain array operations on ``slots``.
+
+    Columns grow by doubling. Readers / writers hold ``lock`` around a
+    read-modify-write so a resize never drops an update.
+    """
+
+    def __init__(self, features, capacity: int = 64):
+        self.features = tuple(features)
+        self.feature_index = {name: i for i, name in enumerate(self.features)}
+        self.lock = threading.RLock()
+
+        self._slots = {}      # (asset, point) → slot
+        self.keys = []        # slot → (asset, point)
+        self.capacity = 0
+        self._columns = {}
+        self._defaults = {}
+        self._groups = {}     # column → group (restored all-or-nothing)
+
+        # ----- baseline (feature × point) -----
+        self.add_column("baseline_mean", np.float64, per_feature=True,
+                        group="baseline")
+        self.add_column("baseline_var", np.float64, per_feature=True,
+                        group="baseline")
+        self.add_column("baseline_count", np.int64, group="baseline")
+
+        # ----- persistence / FSM -----
+        self.add_column("persistence", np.int64)
+        self.add_column("fsm_state", np.int8, fill=STATE_NORMAL, group="fsm")
+        self.add_column("fsm_clear", np.int64, group="fsm")
+
+        # ----- L2 cooldown -----
+        self.add_column("l2_last_trigger", np.float64, fill=np.nan)
+
+        self._grow(max(int(capacity), 1))
+
+    # ==================================================
+    # COLUMNS
+    # ==================================================
+    def add_column(self, name, dtype, per_feature=False, fill=0, shape=(),
+                   group=None):
+        """
+        Register a column: [slot] or [slot, feature] (per_feature) or
+        [slot, *shape]. Existing slots get ``fill``. Columns of one
+        ``group`` only make sense together (checkpoint restore).
+        """
+        with self.lock:
+            self._groups[name] = group or name
+            if per_feature:
+                shape = (len(self.features),)
+            self._defaults[name] = (np.dtype(dtype), tuple(shape), fill)
+            column = np.full((self.capacity,) + tuple(shape), fill, dtype=dtype)
+            self._columns[name] = column
+            setattr(self, name, column)
+
+    def _grow(self, capacity):
+        for name, column in self._columns.items():
+            dtype, shape, fill = self._defaults[name]
+            grown = np.full((capacity,) + shape, fill, dtype=dtype)
+            grown[: self.capacity] = column
+            self._columns[name] = grown
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    # ==================================================
+    # SLOTS
+    # ==================================================
+    def slot(self, asset, point) -> int:
+        key = (asset, point)
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+
+        with self.lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = len(self.keys)
+                if slot >= self.capacity:
+                    self._grow(self.capacity * 2)
+                self._slots[key] = slot
+                self.keys.append(key)
+        return slot
+
+    def slots(self, keys) -> np.ndarray:
+        return np.fromiter(
+            (self.slot(asset, point) for asset, point in keys),
+            dtype=np.int64,
+            count=len(keys),
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    # ==================================================
+    # SNAPSHOT / RESTORE (CHECKPOINT)
+    # ==================================================
+    def snapshot(self):
+        """
+        (keys, {column: array[:n_slots] copy}) — consistent view.
+        """
+        with self.lock:
+            n = len(self.keys)
+            return list(self.keys), {
+                name: column[:n].copy() for name, column in self._columns.items()
+            }
+
+    def load(self, keys, columns):
+        """
+        Restore slots + columns from a snapshot. Columns that are unknown
+        or whose row shape / dtype changed are skipped together with the
+        rest of their group (returned).
+        """
+        with self.lock:
+            bad_groups = {
+                self._groups.get(name, name)
+                for name, values in columns.items()
+                if name not in self._columns
+                or values.shape[1:] != self._columns[name].shape[1:]
+                or values.dtype != self._columns[name].dtype
+            }
+
+            for asset, point in keys:
+                self.slot(asset, point)
+            slots = self.slots(keys)
+
+            skipped = []
+            for name, values in columns.items():
+                if self._groups.get(name, name) in bad_groups:
+                    skipped.append(name)
+                    continue
+                self._columns[name][slots] = values[: len(keys)]
+        return skipped
+
+    def feature_matrix(self, rows) -> np.ndarray:
+        """
+        [{feature: value}, ...] → [rows, features] (missing → 0.0)
+        """
+        matrix = np.zeros((len(rows), len(self.features)))
+        for i, features in enumerate(rows):
+            matrix[i] = [features.get(name, 0.0) for name in self.features]
+        return matrix
+
+
+def unique_waves(slots):
+    """
+    Split batch rows into waves with no repeated slot, keeping order
+    (a point with two windows in one batch is updated twice, in turn).
+    Fancy-index assignment would otherwise keep only the last write.
+    """
+    slots = np.asarray(slots)
+    if np.unique(slots).size == slots.size:
+        return [np.arange(slots.size)]
+
+    waves = []
+    seen = {}
+    for i, slot in enumerate(slots.tolist()):
+        k = seen.get(slot, 0)
+        seen[slot] = k + 1
+        if k == len(waves):
+            waves.append([])
+        waves[k].append(i)
+    return [np.asarray(w) for w in waves]
@@ -1,3 +1,12 @@
+import numpy as np
+
+from core.l1_feature_pipeline import L1FeaturePipeline
+from early_fault.state_store import PointStateStore, unique_waves
+
+TREND_LEVELS = ("NORMAL", "WATCH", "WARNING")
+VELOCITY_ZONES = ("A", "B", "C", "D")
+
+
 class TrendResult:
     def __init__(
         self,
@@ -8,84 +17,297 @@ class TrendResult:
         envelope_high=False,
         velocity_zone="A",
         temperature_alarm=False,
+        hf_mean=None,
+        hf_slope=None,
     ):
         self.level = level
         self.score = score
         self.dominant_feature = dominant_feature
 
+        # === HISTORY (rolling over the trend history) ===
+        self.hf_mean = hf_mean
+        self.hf_slope = hf_slope      # g per window
+
         # === FSM FLAGS (NEW) ===
         self.hf_high = hf_high
         self.envelope_high = envelope_high
         self.velocity_zone = velocity_zone
         self.temperature_alarm = temperature_alarm
 
+
+class TrendBatch:
+    """
+    Trend of a batch of points as arrays (one entry per row):
+    level / velocity_zone are integer codes into TREND_LEVELS /
+    VELOCITY_ZONES; history_mean / std / slope are [rows, features]
+    in the store's feature order.
+    """
+
+    def __init__(self, level, score, hf_high, envelope_high, velocity_zone,
+                 temperature_alarm, dominant_feature, history_mean=None,
+                 history_std=None, history_slope=None, hf_index=0):
+        self.level = level
+        self.score = score
+        self.hf_high = hf_high
+        self.envelope_high = envelope_high
+        self.velocity_zone = velocity_zone
+        self.temperature_alarm = temperature_alarm
+        self.dominant_feature = dominant_feature
+        self.history_mean = history_mean
+        self.history_std = history_std
+        self.history_slope = history_slope
+        self.hf_index = hf_index
+
+    def __len__(self):
+        return len(self.level)
+
+    def result(self, i) -> TrendResult:
+        return TrendResult(
+            level=TREND_LEVELS[self.level[i]],
+            score=float(self.score[i]),
+            dominant_feature=self.dominant_feature[i],
+            hf_high=bool(self.hf_high[i]),
+            envelope_high=bool(self.envelope_high[i]),
+            velocity_zone=VELOCITY_ZONES[self.velocity_zone[i]],
+            temperature_alarm=bool(self.temperature_alarm[i]),
+            hf_mean=self._history_value(self.history_mean, i),
+            hf_slope=self._history_value(self.history_slope, i),
+        )
+
+    def _history_value(self, values, i):
+        if values is None:
+            return None
+        return float(values[i, self.hf_index])
+
+    def results(self):
+        return [self.result(i) for i in range(len(self))]
+
+
 class TrendDetector:
-    def __init__(self, history_size=10):
-        self._history = {}
-        self.history_size = history_size
+    """
+    Per-window trend flags for the FSM.
+
+    The last ``history_size`` feature vectors of every point are kept
+    in the PointStateStore as a circular block
+    trend_history [slot, history_size, feature] (+ head / count), so a
+    window costs one row write; rolling mean / std / slope per feature
+    come from that block.
+
+    level_source: "instant" → HF level from the current window,
+    "history" → from the rolling HF mean (single spikes do not trip it).
+
+    With a BaselineScore (points whose baseline is ready), HF level and
+    the HF / envelope flags come from the point's own deviation
+    (z-scores) instead of the global absolute thresholds, which remain
+    the warm-up fallback. Velocity zones (ISO) stay absolute.
+    """
+
+    # HF trend (g): < WATCH → NORMAL, < WARNING → WATCH, else WARNING
+    HF_LEVELS = np.array([0.05, 0.12])
+    ENVELOPE_HIGH = 0.02            # example threshold
+    # ISO velocity zone edges (mm/s): A | B | C | D
+    VELOCITY_EDGES = np.array([1.8, 2.8, 4.5])
+    TEMPERATURE_ALARM_C = 80.0
+
+    def __init__(self, history_size=10, store: PointStateStore = None,
+                 level_source="instant", z_watch=3.0, z_warning=6.0,
+                 z_envelope=3.0):
+        if store is None:
+            store = PointStateStore(L1FeaturePipeline.CORE_FEATURES)
+        self.store = store
+        self.history_size = int(history_size)
+        self.level_source = level_source
+
+        # baseline deviation levels (z): < watch → NORMAL, < warning → WATCH
+        self.z_levels = np.array([z_watch, z_warning])
+        self.z_envelope = z_envelope
+
+        # store columns of hf / envelope / velocity
+        self._columns = [
+            store.feature_index[name]
+            for name in ("acc_hf_rms_g", "envelope_rms", "overall_vel_rms_mm_s")
+        ]
+        self._hf_index = self._columns[0]
+        self._envelope_index = self._columns[1]
+
+        store.add_column(
+            "trend_history",
+            np.float64,
+            shape=(self.history_size, len(store.features)),
+            group="trend",
+        )
+        store.add_column("trend_head", np.int64, group="trend")
+        store.add_column("trend_count", np.int64, group="trend")
+
+        self._positions = np.arange(self.history_size)
 
     def update(self, asset, point, features):
-      key = (asset, point)
-
-      if "acc_hf_rms_g" not in features:
-          return TrendResult(level="NORMAL", score=0.0)
-
-      hist = self._history.setdefault(key, [])
-      hist.append(features)
-
-      if len(hist) > self.history_size:
-          hist.pop(0)
-
-      # ============================
-      # HF TREND
-      # ============================
-      hf = features["acc_hf_rms_g"]
-
-      if hf < 0.05:
-          level = "NORMAL"
-      elif hf < 0.12:
-          level = "WATCH"
-      else:
-          level = "WARNING"
-
-      hf_high = hf >= 0.12
-
-      # ============================
-      # ENVELOPE CONFIRMATION
-      # ============================
-      envelope = features.get("envelope_rms", 0.0)
-      envelope_high = envelope > 0.02   # example threshold
-
-      # ============================
-      # VELOCITY ISO ZONE
-      # ============================
-      vel = features.get("overall_vel_rms_mm_s", 0.0)
-      if vel < 1.8:
-          velocity_zone = "A"
-      elif vel < 2.8:
-          velocity_zone = "B"
-      elif vel < 4.5:
-          velocity_zone = "C"
-      else:
-          velocity_zone = "D"
-
-      # ============================
-      # TEMPERATURE
-      # ============================
-      temp = features.get("temperature_c", 0.0)
-      temperature_alarm = temp >= 80.0
-
-      dominant_feature = max(
-          features,
-          key=lambda k: abs(features[k])
-      )
-
-      return TrendResult(
-          level=level,
-          score=hf,
-          dominant_feature=dominant_feature,
-          hf_high=hf_high,
-          envelope_high=envelope_high,
-          velocity_zone=velocity_zone,
-          temperature_alarm=temperature_alarm,
-      )
+        if "acc_hf_rms_g" not in features:
+            return TrendResult(level="NORMAL", score=0.0)
+
+        slot = self.store.slot(asset, point)
+        return self.update_batch(np.array([slot]), [features]).result(0)
+
+    def update_batch(self, slots, rows, values=None, baseline=None) -> TrendBatch:
+        """
+        slots: store slot per row, rows: L1 feature dict per row
+        values: optional store.feature_matrix(rows) (reused if given)
+        baseline: optional BaselineScore of the rows
+        """
+        store = self.store
+        k = len(rows)
+        if values is None:
+            values = store.feature_matrix(rows)
+        valid = np.array(
+            ["acc_hf_rms_g" in features for features in rows], dtype=bool
+        )
+
+        # FSM inputs: hf, envelope, velocity, temperature
+        inputs = np.zeros((k, 4))
+        inputs[:, :3] = values[:, self._columns]
+        inputs[:, 3] = [features.get("temperature_c", 0.0) for features in rows]
+        inputs[~valid] = 0.0
+
+        # ============================
+        # HISTORY (CIRCULAR, PER SLOT)
+        # ============================
+        n_features = len(store.features)
+        mean = np.zeros((k, n_features))
+        std = np.zeros((k, n_features))
+        slope = np.zeros((k, n_features))
+
+        with store.lock:
+            for rows_idx in unique_waves(slots):
+                rows_idx = rows_idx[valid[rows_idx]]
+                if rows_idx.size == 0:
+                    continue
+                s = slots[rows_idx]
+                self._record(s, values[rows_idx])
+                mean[rows_idx], std[rows_idx], slope[rows_idx] = self._stats(s)
+
+        hf, envelope, vel, temp = inputs.T
+
+        # ============================
+        # HF TREND
+        # ============================
+        hf_level = hf
+        if self.level_source == "history":
+            hf_level = np.where(valid, mean[:, self._hf_index], 0.0)
+
+        level = np.searchsorted(self.HF_LEVELS, hf_level, side="right")
+        hf_high = hf_level >= self.HF_LEVELS[-1]
+
+        # ============================
+        # ENVELOPE CONFIRMATION
+        # ============================
+        envelope_high = envelope > self.ENVELOPE_HIGH
+
+        # ============================
+        # SITE BASELINE (z-scores)
+        # ============================
+        if baseline is not None:
+            ready = baseline.ready & valid
+            hf_mean = baseline.mean[:, self._hf_index]
+            hf_std = baseline.std[:, self._hf_index]
+            z_hf = (hf_level - hf_mean) / hf_std
+            z_envelope = baseline.z[:, self._envelope_index]
+
+            level = np.where(
+                ready, np.searchsorted(self.z_levels, z_hf, side="right"), level
+            )
+            hf_high = np.where(ready, z_hf >= self.z_levels[-1], hf_high)
+            envelope_high = np.where(
+                ready, z_envelope >= self.z_envelope, envelope_high
+            )
+
+        # ============================
+        # VELOCITY ISO ZONE
+        # ============================
+        velocity_zone = np.searchsorted(self.VELOCITY_EDGES, vel, side="right")
+
+        # ============================
+        # TEMPERATURE
+        # ============================
+        temperature_alarm = temp >= self.TEMPERATURE_ALARM_C
+
+        dominant_feature = [
+            max(features, key=lambda name: abs(features[name])) if ok else None
+            for features, ok in zip(rows, valid)
+        ]
+
+        return TrendBatch(
+            level=level,
+            score=hf,
+            hf_high=hf_high,
+            envelope_high=envelope_high,
+            velocity_zone=velocity_zone,
+            temperature_alarm=temperature_alarm,
+            dominant_feature=dominant_feature,
+            history_mean=mean,
+            history_std=std,
+            history_slope=slope,
+            hf_index=self._hf_index,
+        )
+
+    # ==================================================
+    # HISTORY
+    # ==================================================
+    def _record(self, slots, values):
+        store = self.store
+        head = store.trend_head[slots]
+        store.trend_history[slots, head] = values
+        store.trend_head[slots] = (head + 1) % self.history_size
+        store.trend_count[slots] = np.minimum(
+            store.trend_count[slots] + 1, self.history_size
+        )
+
+    def _stats(self, slots):
+        """
+        Rolling mean / std / least-squares slope (per window) of every
+        feature over the stored history → [slots, features] each.
+        """
+        store = self.store
+        H = self.history_size
+
+        block = store.trend_history[slots]                  # [k, H, F]
+        count = store.trend_count[slots]
+        head = store.trend_head[slots]
+
+        valid = self._positions[None, :] < count[:, None]   # [k, H]
+        # age order: oldest → newest (constant offset while filling)
+        t = ((self._positions[None, :] - head[:, None]) % H).astype(np.float64)
+
+        w = valid.astype(np.float64)
+        n = np.maximum(count, 1)[:, None]
+
+        mean = np.einsum("kh,khf->kf", w, block) / n
+        dev = (block - mean[:, None, :]) * w[:, :, None]
+        std = np.sqrt(np.einsum("khf,khf->kf", dev, dev) / n)
+
+        t_dev = (t - (np.sum(w * t, axis=1, keepdims=True) / n)) * w
+        denom = np.sum(t_dev * t_dev, axis=1)[:, None]
+        slope = np.divide(
+            np.einsum("kh,khf->kf", t_dev, dev),
+            denom,
+            out=np.zeros_like(mean),
+            where=denom > 0,
+        )
+
+        return mean, std, slope
+
+    def history_stats(self, asset, point) -> dict:
+        """
+        {feature: {"mean", "std", "slope"}} over the point's history
+        """
+        slot = self.store.slot(asset, point)
+        with self.store.lock:
+            mean, std, slope = self._stats(np.array([slot]))
+
+        return {
+            name: {
+                "mean": float(mean[0, i]),
+                "std": float(std[0, i]),
+                "slope": float(slope[0, i]),
+            }
+            for i, name in enumerate(self.store.features)
+        }
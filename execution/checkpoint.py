@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# ==================================================
+# FILE LAYOUT
+# ==================================================
+# header   <4sII   magic "VBRS", schema version, index length
+# index    JSON    keys, features, meta, columns {name: dtype, shape, offset}
+# data     raw column bytes, each block aligned to ALIGN
+#
+# Bump CHECKPOINT_VERSION whenever the meaning of a column changes;
+# files with another version are ignored at startup.
+CHECKPOINT_VERSION = 1
+
+_MAGIC = b"VBRS"
+_HEADER = struct.Struct("<4sII")
+ALIGN = 64
+
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def write_checkpoint(path, keys, features, columns, meta=None):
+    """
+    Atomic write: temp file + fsync + rename + directory fsync, so a
+    crash mid-write leaves the previous checkpoint intact and a
+    completed rename survives a power loss.
+    """
+    layout = {}
+    offset = 0
+    for name, values in columns.items():
+        layout[name] = {
+            "dtype": values.dtype.str,
+            "shape": list(values.shape),
+            "offset": offset,
+        }
+        offset = _align(offset + values.nbytes)
+
+    index = json.dumps({
+        "keys": [list(key) for key in keys],
+        "features": list(features),
+        "meta": meta or {},
+        "columns": layout,
+    }).encode("utf-8")
+    data_start = _align(_HEADER.size + len(index))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, CHECKPOINT_VERSION, len(index)))
+        f.write(index)
+        for name, values in columns.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(values).tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+    # the rename lives in the directory entry → sync that too
+    dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def read_checkpoint(path):
+    """
+    → (keys, features, meta, {column: memmapped read-only array})
+    Raises ValueError on a foreign file or another schema version.
+    """
+    with open(path, "rb") as f:
+        magic, version, index_len = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"Not a state checkpoint: {path}")
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(
+                f"Checkpoint version {version} != {CHECKPOINT_VERSION}"
+            )
+        index = json.loads(f.read(index_len).decode("utf-8"))
+
+    data_start = _align(_HEADER.size + index_len)
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+
+    columns = {}
+    for name, spec in index["columns"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        start = data_start + spec["offset"]
+        count = int(np.prod(shape)) * dtype.itemsize
+        columns[name] = raw[start:start + count].view(dtype).reshape(shape)
+
+    keys = [tuple(key) for key in index["keys"]]
+    return keys, index["features"], index["meta"], columns
+
+
+class StateCheckpoint:
+    """
+    Periodic warm-restart snapshots of a PointStateStore
+    (baseline, trend history, persistence, FSM, L2 cooldown).
+
+    - restore(): at startup; ignored when the version, the feature set
+      or the meta (e.g. shard layout) differs
+    - start(): background thread writing every ``interval_sec``
+    - stop(): final snapshot (graceful shutdown / SIGTERM)
+    """
+
+    def __init__(self, store, path: str, interval_sec: float = 60.0,
+                 meta: dict = None):
+        self.store = store
+        self.path = path
+        self.interval_sec = interval_sec
+        self.meta = meta or {}
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._save_lock = threading.Lock()
+
+        self.saves = 0
+        self.last_save_ts = None
+        self.last_save_ms = None
+        self.restored_points = 0
+
+    def restore(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+
+        t0 = time.perf_counter()
+        try:
+            keys, features, meta, columns = read_checkpoint(self.path)
+        except (ValueError, OSError, KeyError, struct.error) as exc:
+            log.warning("[CHECKPOINT] Ignoring %s: %s", self.path, exc)
+            return False
+
+        if tuple(features) != self.store.features or meta != self.meta:
+            log.warning(
+                "[CHECKPOINT] Ignoring %s: schema changed (features / meta)",
+                self.path,
+            )
+            return False
+
+        skipped = self.store.load(keys, columns)
+        del columns
+
+        self.restored_points = len(keys)
+        log.info(
+            "[CHECKPOINT] Restored %d points from %s in %.1f ms%s",
+            len(keys),
+            self.path,
+            (time.perf_counter() - t0) * 1000,
+            f" (skipped columns: {skipped})" if skipped else "",
+        )
+        return True
+
+    def save(self):
+        with self._save_lock:
+            t0 = time.perf_counter()
+            keys, columns = self.store.snapshot()
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            write_checkpoint(
+                self.path, keys, self.store.features, columns, self.meta
+            )
+
+            self.saves += 1
+            self.last_save_ts = time.time()
+            self.last_save_ms = (time.perf_counter() - t0) * 1000
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_sec):
+            try:
+                self.save()
+            except Exception:
+                log.exception("[CHECKPOINT] Periodic save failed")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        try:
+            self.save()
+        except Exception:
+            log.exception("[CHECKPOINT] Final save failed")
+
+    def stats(self) -> dict:
+        return {
+            "checkpoint_saves": self.saves,
+            "checkpoint_last_save_ts": self.last_save_ts,
+            "checkpoint_last_save_ms": self.last_save_ms,
+            "checkpoint_restored_points": self.restored_points,
+        }
@@ -0,0 +1,630 @@
+import functools
+import logging
+import multiprocessing as mp
+import time
+
+from core.fft_backend import FFTBackend, configure_fft_backend
+from core.l1_feature_pipeline import L1FeaturePipeline
+from core.machine_kinematics import BEARING_DEFECTS
+from core.point_profile import (
+    build_point_profile,
+    extras_for,
+    normalize_extra_features,
+)
+from core.spectral_cache import SpectralCache
+from config.config_loader import load_points
+
+from early_fault.trend_detector import TrendDetector
+from early_fault.persistence import PersistenceChecker
+from early_fault.scoring import EarlyFaultFSM
+from early_fault.baseline import AdaptiveBaseline
+from early_fault.state_store import PointStateStore
+from execution.checkpoint import StateCheckpoint
+
+from diagnostic_l2.cooldown import L2CooldownManager
+from diagnostic_l2.diagnostic_engine import DiagnosticEngine
+from diagnostic_l2.fault_rules import RuleBook
+from diagnostic_l2.l2_pool import L2ProcessPool
+from diagnostic_l2.l2_queue import L2JobQueue
+from diagnostic_l2.worker import l2_worker
+
+from analytics.interpretation.interpretation_engine import InterpretationEngine
+from analytics.recommendation.recommendation_engine import RecommendationEngine
+
+log = logging.getLogger(__name__)
+
+
+# ==================================================
+# PHI → STATE (FINAL AUTHORITY)
+# ==================================================
+def phi_to_state(phi: float) -> str:
+    if phi >= 90:
+        return "NORMAL"
+    elif phi >= 75:
+        return "WATCH"
+    elif phi >= 55:
+        return "WARNING"
+    else:
+        return "ALARM"
+
+
+# ==================================================
+# POINT HEALTH INDEX (PHYSICS-BASED)
+# ==================================================
+def compute_point_health_index(l1_features):
+    vel = min(l1_features["overall_vel_rms_mm_s"] / 7.1, 1.0)
+    env = min(l1_features["envelope_rms"] / 0.35, 1.0)
+    crest = min(l1_features["crest_factor"] / 6.0, 1.0)
+
+    severity = 0.5 * vel + 0.3 * env + 0.2 * crest
+    phi = 100.0 * (1.0 - severity)
+
+    return round(max(min(phi, 100.0), 0.0), 1)
+
+
+class PointProcessor:
+    """
+    Window analytics chain (everything after the ring buffer):
+    L1 → trend → baseline → persistence → FSM → PHI →
+    interpretation → recommendation → publish → L2 trigger.
+
+    Owns all per-point runtime state, so a point must always be
+    processed by the same instance (inline runner or one shard worker).
+    """
+
+    def __init__(self, config: dict, publisher, heartbeat=None,
+                 checkpoint_meta=None):
+        """
+        checkpoint_meta: identifies this processor's checkpoint file
+        (e.g. {"shard": 1, "shards": 4}); a file written under other
+        meta is not restored.
+        """
+        self.publisher = publisher
+        self.heartbeat = heartbeat
+
+        # =========================
+        # ENGINES
+        # =========================
+        self.interpretation_engine = InterpretationEngine()
+        self.recommendation_engine = RecommendationEngine()
+
+        # =========================
+        # POINT STATE (slot per asset:point, NumPy columns)
+        # shared by trend / baseline / persistence / FSM / L2 cooldown
+        # =========================
+        self.state_store = PointStateStore(L1FeaturePipeline.CORE_FEATURES)
+
+        # =========================
+        # BASELINE
+        # =========================
+        baseline_cfg = config.get("baseline", {})
+        self.baseline = AdaptiveBaseline(
+            alpha=baseline_cfg.get("alpha", 0.01),
+            min_samples=baseline_cfg.get("min_samples", 100),
+            store=self.state_store,
+            learn_z=baseline_cfg.get("learn_z", 3.0),
+            gate_features=baseline_cfg.get("gate_features", ["acc_hf_rms_g"]),
+            warmup_max=baseline_cfg.get("warmup_max", {"acc_hf_rms_g": 0.05}),
+            robust_features=baseline_cfg.get("robust_features", []),
+        )
+
+        # =========================
+        # L2 SYSTEM
+        # =========================
+        l2_cfg = config["l2"]
+        self.l2_enabled = l2_cfg["enable"]
+        self.l2_cooldown = L2CooldownManager(
+            warning_sec=l2_cfg["cooldown_warning_sec"],
+            alarm_sec=l2_cfg["cooldown_alarm_sec"],
+            store=self.state_store,
+        )
+
+        # =========================
+        # CORE PIPELINE
+        # FFT backend is per process (sharded workers configure their own)
+        # =========================
+        l1_cfg = config["l1_feature"]
+        self.fft = configure_fft_backend(
+            {
+                "backend": l1_cfg.get("fft_backend", "scipy"),
+                "workers": l1_cfg.get("fft_workers", 1),
+            },
+            n=config["raw"]["window_size"],
+            batch=l1_cfg.get("batch_max_points", 16),
+            dtype=l1_cfg.get("dtype", "float64"),
+        )
+
+        self.l1_pipeline = L1FeaturePipeline(
+            fs=l1_cfg["sampling_rate"],
+            rpm=l1_cfg["rpm_default"],
+            dtype=l1_cfg.get("dtype", "float64"),
+            fft=self.fft,
+        )
+
+        # latest spectrum + envelope per point, reused by L2 / on demand
+        cache_mb = l1_cfg.get("spectral_cache_mb", 32)
+        self.spectral_cache = (
+            SpectralCache(l1_cfg["sampling_rate"], max_bytes=cache_mb * 1024 * 1024)
+            if cache_mb > 0
+            else None
+        )
+        if self.spectral_cache is not None and heartbeat is not None:
+            heartbeat.register_source("spectral_cache", self.spectral_cache.stats)
+
+        # =========================
+        # PER-POINT PROFILES
+        # points table (config/config.yaml): type, rpm, bearing, gear_teeth
+        # → rpm-aware order / bearing bin tables per asset:point
+        # =========================
+        self.fs = l1_cfg["sampling_rate"]
+        self.window_size = config["raw"]["window_size"]
+        self.rpm_default = l1_cfg["rpm_default"]
+        self.speed_tolerance = l1_cfg.get("speed_tolerance", 0.02)
+
+        self.point_specs = load_points(l1_cfg.get("points_file", "config/config.yaml"))
+
+        # point | "asset:point" → extra L1 features (kurtosis, skewness, ...),
+        # keys lower-cased like the points table
+        self.extra_features = {
+            key: L1FeaturePipeline.validate_features(names)
+            for key, names in normalize_extra_features(
+                l1_cfg.get("extra_features")
+            ).items()
+        }
+
+        # Validate the whole table at startup (bearing presets, features);
+        # profiles themselves are per asset:point (speed state)
+        l1_outputs = dict.fromkeys(L1FeaturePipeline.CORE_FEATURES)
+        for names in self.extra_features.values():
+            l1_outputs.update(dict.fromkeys(names))
+        for name in self.point_specs:
+            l1_outputs.update(dict.fromkeys(self._build_profile(None, name).extras))
+        self.profiles = {}
+
+        # =========================
+        # L2 EXECUTION
+        # severity / age ordered, coalesced per point; results are
+        # published from this process
+        # =========================
+        # fault rules: YAML, re-read when the file changes
+        rules = (l2_cfg.get("rules_file", "config/fault_rules.yaml"),
+                 l2_cfg.get("rules_reload_sec", 5))
+
+        self.l2_pool = None
+        self.l2_engine = DiagnosticEngine(RuleBook(*rules))
+        l2_worker_fn = functools.partial(l2_worker, engine=self.l2_engine)
+        if l2_cfg.get("pool", "thread") == "process":
+            if mp.current_process().daemon:
+                # shard workers are daemonic and cannot own child processes
+                log.warning("[L2] Process pool unavailable here — using threads")
+            else:
+                self.l2_pool = L2ProcessPool(
+                    workers=l2_cfg.get("max_workers") or 2,
+                    window_size=self.window_size,
+                    features=tuple(l1_outputs),
+                    dtype=l1_cfg.get("dtype", "float64"),
+                    rules=rules,
+                )
+                l2_worker_fn = self.l2_pool.run
+        self._l2_worker_fn = l2_worker_fn
+
+        self.l2_queue = L2JobQueue(
+            maxsize=l2_cfg.get("queue_size", 32),
+            min_workers=l2_cfg.get("min_workers", 1),
+            max_workers=(
+                self.l2_pool.workers
+                if self.l2_pool is not None
+                else l2_cfg.get("max_workers", 0)
+            ),
+            jobs_per_worker=l2_cfg.get("jobs_per_worker", 2),
+            idle_sec=l2_cfg.get("idle_sec", 30),
+        )
+        self.l2_queue.start(self._run_l2, on_result=self._publish_l2_result)
+        if heartbeat is not None:
+            heartbeat.register_source("l2", self.l2_queue.stats)
+
+        self.trend_detector = TrendDetector(
+            history_size=config["early_fault"].get("trend_history", 10),
+            store=self.state_store,
+            level_source=config["early_fault"].get("trend_level", "instant"),
+            z_watch=config["early_fault"].get("z_watch", 3.0),
+            z_warning=config["early_fault"].get("z_warning", 6.0),
+            z_envelope=config["early_fault"].get("z_envelope", 3.0),
+        )
+        self.persistence_checker = PersistenceChecker(store=self.state_store)
+
+        self.early_fault_fsm = EarlyFaultFSM(
+            watch_persistence=config["early_fault"]["watch_persistence"],
+            warning_persistence=config["early_fault"]["warning_persistence"],
+            alarm_persistence=config["early_fault"]["alarm_persistence"],
+            hysteresis_clear=config["early_fault"]["hysteresis_clear"],
+            store=self.state_store,
+        )
+
+        # =========================
+        # WARM RESTART (after every component registered its columns)
+        # =========================
+        self.checkpoint = None
+        ckpt_cfg = config.get("checkpoint", {})
+        if ckpt_cfg.get("enable", False):
+            meta = checkpoint_meta or {}
+            path = ckpt_cfg.get("path", "state/vibralyzer.ckpt")
+            if "shard" in meta:
+                path = f"{path}.shard{meta['shard']}"
+
+            self.checkpoint = StateCheckpoint(
+                self.state_store,
+                path,
+                interval_sec=ckpt_cfg.get("interval_sec", 60),
+                meta=meta,
+            )
+            self.checkpoint.restore()
+            self.checkpoint.start()
+            if heartbeat is not None:
+                heartbeat.register_source("checkpoint", self.checkpoint.stats)
+
+    def close(self):
+        """
+        Graceful shutdown: stop L2 workers, final checkpoint.
+        """
+        self.l2_queue.stop()
+        if self.l2_pool is not None:
+            self.l2_pool.close()
+        if self.checkpoint is not None:
+            self.checkpoint.stop()
+
+    # ==================================================
+    # L1
+    # ==================================================
+    def _build_profile(self, asset_id, point):
+        spec = self.point_specs.get(str(point).lower())
+        profile = build_point_profile(
+            point,
+            spec,
+            fs=self.fs,
+            window_size=self.window_size,
+            rpm_default=self.rpm_default,
+            extras=extras_for(self.extra_features, asset_id, point),
+            speed_tolerance=self.speed_tolerance,
+        )
+        L1FeaturePipeline.validate_features(profile.extras)
+        return profile
+
+    def profile_for(self, asset_id, point):
+        """
+        PointProfile of asset:point, created on its first window.
+        """
+        key = f"{asset_id}:{point}"
+        profile = self.profiles.get(key)
+        if profile is None:
+            profile = self._build_profile(asset_id, point)
+            self.profiles[key] = profile
+        return profile
+
+    def compute_l1(self, window, time_stats=None, asset_id=None, point=None,
+                   speed=None, with_seq=False):
+        """
+        time_stats: RingBufferManager.get_time_stats() of the window
+        asset_id / point: select the point profile (extras, order bins)
+        speed: reported speed (rpm) of the window, if any
+        with_seq: → (l1_features, window seq in the spectral cache or None)
+        """
+        if self.heartbeat is not None:
+            self.heartbeat.mark_l1_exec()
+
+        profile = None
+        if point is not None:
+            profile = self.profile_for(asset_id, point)
+            profile.update_speed(speed)
+
+        seqs = [None]
+        result = self.l1_pipeline.compute(
+            window,
+            extras=profile.extras if profile else (),
+            profile=profile,
+            spectrum_sink=self._spectrum_sink(
+                None if point is None else [(asset_id, point)], seqs
+            ),
+            time_stats=time_stats,
+        )
+        return (result, seqs[0]) if with_seq else result
+
+    def compute_l1_batch(self, windows, time_stats=None, keys=None, speeds=None,
+                         with_seq=False):
+        """
+        time_stats: one RingBufferManager.get_time_stats() per row, or None
+        keys: one (asset_id, point) per row → point profiles
+        speeds: one reported speed (rpm or None) per row
+        with_seq: → (results, spectral cache window seq per row or None)
+        """
+        profiles = extras = None
+        if keys is not None:
+            profiles = [self.profile_for(asset_id, point) for asset_id, point in keys]
+            for profile, speed in zip(profiles, speeds or ()):
+                profile.update_speed(speed)
+            extras = [profile.extras for profile in profiles]
+
+        seqs = [None] * len(windows)
+        results = self.l1_pipeline.compute_batch(
+            windows,
+            extras=extras,
+            profiles=profiles,
+            spectrum_sink=self._spectrum_sink(keys, seqs),
+            time_stats=time_stats,
+        )
+        if self.heartbeat is not None:
+            for _ in results:
+                self.heartbeat.mark_l1_exec()
+        return (results, seqs) if with_seq else results
+
+    def _spectrum_sink(self, keys, seqs):
+        """
+        Cache the batch's spectra; the window seq of each row goes into
+        ``seqs`` (a point can appear in a batch more than once)
+        """
+        if self.spectral_cache is None or keys is None:
+            return None
+
+        def sink(spectrum, envelope):
+            seqs[:] = self.spectral_cache.put_batch(keys, spectrum, envelope)
+        return sink
+
+    def latest_spectrum(self, asset_id, point, envelope=False):
+        """
+        On-demand spectrum of the point's latest window from the cache
+        → (seq, freqs_hz, amplitude_g) or None.
+        """
+        if self.spectral_cache is None:
+            return None
+
+        key = (asset_id, point)
+        entry = self.spectral_cache.get(key)
+        if entry is None:
+            return None
+
+        amplitude = (
+            self.spectral_cache.envelope_spectrum(key, entry)
+            if envelope
+            else entry.amplitude
+        )
+        freqs = FFTBackend.rfftfreq(entry.envelope.size, self.fs)
+        return entry.seq, freqs, amplitude
+
+    # ==================================================
+    # POST-L1 CHAIN
+    # ==================================================
+    def process(self, asset_id, point, raw_payload, window, l1_features,
+                window_seq=None):
+        self.process_batch(
+            [(asset_id, point, raw_payload, window, l1_features)],
+            window_seqs=[window_seq],
+        )
+
+    def process_batch(self, items, window_seqs=None):
+        """
+        items: [(asset_id, point, raw_payload, window, l1_features), ...]
+        window_seqs: spectral cache seq per item (compute_l1_batch
+        with_seq), so L2 jobs get the spectra of their own window
+
+        Trend → baseline → persistence → FSM run as array operations on
+        the points' store slots; the rest is per point.
+        """
+        store = self.state_store
+        rows = [item[4] for item in items]
+
+        with store.lock:
+            slots = store.slots([(item[0], item[1]) for item in items])
+
+            values = store.feature_matrix(rows)
+
+            # z vs the baseline before this window, then gated learning
+            baseline = self.baseline.update_and_score(slots, values)
+
+            trends = self.trend_detector.update_batch(
+                slots, rows, values, baseline=baseline
+            )
+
+            persistence = self.persistence_checker.update_batch(
+                slots, trends.level != 0
+            )
+
+            early_faults = self.early_fault_fsm.update_batch(
+                slots, trends, persistence
+            )
+
+        if window_seqs is None:
+            window_seqs = [None] * len(items)
+
+        for i, (item, raw_trend, early_fault, window_seq) in enumerate(
+            zip(items, trends.results(), early_faults, window_seqs)
+        ):
+            evidence = {
+                "baseline_ready": bool(baseline.ready[i]),
+                "zscores": baseline.zscores(i, store.features),
+            }
+            self._process_point(
+                *item, raw_trend, early_fault, evidence, window_seq
+            )
+
+    def _process_point(self, asset_id, point, raw_payload, window, l1_features,
+                       raw_trend, early_fault, evidence, window_seq=None):
+        # =========================
+        # FINAL HEALTH DECISION
+        # =========================
+        phi = compute_point_health_index(l1_features)
+        state = phi_to_state(phi)
+
+        fault_type = (
+            "GENERAL_HEALTH"
+            if state in ("NORMAL", "WATCH")
+            else early_fault.dominant_feature or "GENERAL_HEALTH"
+        )
+
+        # =========================
+        # INTERPRETATION (WHY)
+        # =========================
+        interpretation = self.interpretation_engine.interpret(
+            asset=asset_id,
+            point=point,
+            l1_features=l1_features,
+            trend=raw_trend,
+            early_fault=early_fault,
+            phi=phi,
+            state=state,
+        )
+
+        # =========================
+        # RECOMMENDATION (WHAT TO DO)
+        # =========================
+        recommendation = self.recommendation_engine.recommend(
+            fault_type=fault_type,
+            state=state,
+            lang="id",
+        )
+
+        # =========================
+        # 1️⃣ SCADA (VALUES ONLY)
+        # =========================
+        self.publisher.publish_scada(
+            asset_id,
+            point,
+            {
+                "asset": asset_id,
+                "point": point,
+                "acceleration_rms_g": l1_features["acc_rms_g"],
+                "acc_peak_g": l1_features["acc_peak_g"],
+                "acc_hf_rms_g": l1_features["acc_hf_rms_g"],
+                "crest_factor": l1_features["crest_factor"],
+                "envelope_rms": l1_features["envelope_rms"],
+                "overall_vel_rms_mm_s": l1_features["overall_vel_rms_mm_s"],
+                "energy_low": l1_features["energy_low"],
+                "energy_high": l1_features["energy_high"],
+                **{
+                    name: l1_features[name]
+                    for name in self.profile_for(asset_id, point).extras
+                },
+                "temperature_c": raw_payload.get("temperature"),
+                "point_health_index": phi,
+                "state": state,
+            },
+        )
+
+        # =========================
+        # 2️⃣ FINAL HEALTH ALARM
+        # =========================
+        self.publisher.publish_health_alarm(
+            asset_id,
+            point,
+            {
+                "asset": asset_id,
+                "point": point,
+                "state": state,
+                "point_health_index": phi,
+                "timestamp": time.time(),
+            },
+        )
+
+        # =========================
+        # 3️⃣ INTERPRETATION (WHY)
+        # =========================
+        self.publisher.publish_interpretation(asset_id, point, interpretation)
+
+        # =========================
+        # 4️⃣ RECOMMENDATION (WHAT)
+        # =========================
+        self.publisher.publish_recommendation(
+            asset_id,
+            point,
+            {
+                "asset": asset_id,
+                "point": point,
+                "state": state,
+                "fault_type": fault_type,
+                "rec_level": recommendation.get("level"),
+                "rec_priority": recommendation.get("priority"),
+                "rec_action_code": recommendation.get("action_code"),
+                "rec_text": recommendation.get("text"),
+                "timestamp": time.time(),
+            },
+        )
+
+        # =========================
+        # 5️⃣ EARLY FAULT (EVIDENCE)
+        # =========================
+        self.publisher.publish_early_fault(
+            asset_id,
+            point,
+            {
+                "asset": asset_id,
+                "point": point,
+                "fsm_state": early_fault.state.value,
+                "confidence": early_fault.confidence,
+                "fault_type": fault_type,
+                "baseline_ready": evidence["baseline_ready"],
+                "zscores": evidence["zscores"],
+                "timestamp": early_fault.timestamp,
+            },
+        )
+
+        # =========================
+        # L2 TRIGGER
+        # =========================
+        if self.l2_enabled and state in ("WARNING", "ALARM"):
+            if self.l2_cooldown.can_trigger(asset_id, point, state):
+                self.l2_queue.enqueue(
+                    {
+                        "asset": asset_id,
+                        "point": point,
+                        "window": window.copy(),
+                        "window_seq": window_seq,
+                        "l1_features": dict(l1_features),
+                        "kinematics": self._l2_kinematics(asset_id, point),
+                        "early_fault_event": {
+                            "fsm_state": early_fault.state.value,
+                            "fault_type": fault_type,
+                            "confidence": early_fault.confidence,
+                        },
+                        "health_event": {
+                            "state": state,
+                            "point_health_index": phi,
+                        },
+                    },
+                    severity=state,
+                )
+                self.l2_cooldown.mark_triggered(asset_id, point)
+
+    def _l2_kinematics(self, asset_id, point):
+        """
+        Bearing defect orders of the point at its current speed
+        (envelope-spectrum diagnostics); no bearing → no orders.
+        """
+        profile = self.profile_for(asset_id, point)
+        return {
+            "fs": self.fs,
+            "rpm": profile.rpm,
+            "orders": {
+                name: order
+                for name, order in profile.kinematics.orders.items()
+                if name in BEARING_DEFECTS
+            },
+        }
+
+    def _run_l2(self, job):
+        """
+        L2 job on a scheduler thread: attach the cached spectra of the
+        job's window (if still cached), then run it.
+        """
+        if self.spectral_cache is not None and job.get("window_seq"):
+            spectrum, envelope_spectrum = self.spectral_cache.spectra(
+                (job["asset"], job["point"]), job["window_seq"]
+            )
+            if spectrum is not None:
+                job = dict(
+                    job, spectrum=spectrum, envelope_spectrum=envelope_spectrum
+                )
+        return self._l2_worker_fn(job)
+
+    def _publish_l2_result(self, job, payload):
+        self.publisher.publish_l2_result(job["asset"], job["point"], payload)
+        if self.heartbeat is not None:
+            self.heartbeat.mark_l2_exec()
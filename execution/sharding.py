@@ -0,0 +1,328 @@
+import logging
+import multiprocessing as mp
+import queue
+import signal
+import threading
+import time
+import zlib
+from multiprocessing import shared_memory
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+def shard_for(asset, point, n_shards: int, by: str = "point") -> int:
+    """
+    Stable asset:point → shard mapping (independent of PYTHONHASHSEED,
+    so a point lands on the same shard after every restart).
+    by="asset": every point of an asset on one shard (one publisher
+    per asset, e.g. coalesced per-asset output).
+    """
+    key = asset if by == "asset" else f"{asset}:{point}"
+    return zlib.crc32(key.encode("utf-8")) % n_shards
+
+
+class _WindowSlots:
+    """
+    Fixed pool of window-sized slots in one shared-memory block.
+    The main process writes a window into a free slot, the shard worker
+    gathers it out of the block and hands the slot index back.
+    """
+
+    def __init__(self, slots, window_size, dtype, name=None):
+        self.slots = slots
+        self.window_size = window_size
+        self.dtype = np.dtype(dtype)
+
+        nbytes = slots * window_size * self.dtype.itemsize
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        else:
+            # Spawned workers share the parent's resource tracker, so
+            # attaching does not transfer ownership; the parent unlinks.
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self.block = np.ndarray(
+            (slots, window_size), dtype=self.dtype, buffer=self.shm.buf
+        )
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        del self.block
+        self.shm.close()
+
+
+class _ShardReporter:
+    """
+    Sends the shard's heartbeat snapshot (counters + stats sources:
+    publish, l2, spectral_cache, checkpoint) to the parent at most every
+    ``interval_sec``, after processed batches (idle shard → nothing new).
+    """
+
+    def __init__(self, shard_id, heartbeat, reports, interval_sec):
+        self.shard_id = shard_id
+        self.heartbeat = heartbeat
+        self.reports = reports
+        # best effort: never block the shard's exit on unread reports
+        self.reports.cancel_join_thread()
+        self.interval_sec = interval_sec
+        self._last = 0.0
+
+    def __call__(self, force=False):
+        now = time.monotonic()
+        if force or now - self._last >= self.interval_sec:
+            self._last = now
+            self.reports.put((self.shard_id, self.heartbeat.snapshot()))
+
+
+def _shard_main(shard_id, n_shards, shard_by, config, shm_name, slots,
+                window_size, dtype, jobs, free_slots, processed, reports,
+                max_batch):
+    """
+    Shard worker process: owns every point hashed to ``shard_id``
+    (L1 + trend / baseline / persistence / FSM state + publishing).
+    """
+    # Imported here so the parent never opens a publisher for workers
+    from execution.point_processor import PointProcessor
+    from publish.mqtt_publisher import MQTTPublisher
+    from utils.heartbeat import Heartbeat
+
+    window_slots = _WindowSlots(slots, window_size, dtype, name=shm_name)
+
+    # Shard-local heartbeat: reported to the parent, never published
+    heartbeat = Heartbeat(service_name=f"vibralyzer-shard-{shard_id}")
+    report = _ShardReporter(
+        shard_id,
+        heartbeat,
+        reports,
+        config.get("heartbeat", {}).get("interval_sec", 10),
+    )
+
+    publisher = MQTTPublisher.from_config(config)
+    heartbeat.register_source("publish", publisher.stats)
+    processor = PointProcessor(
+        config,
+        publisher=publisher,
+        heartbeat=heartbeat,
+        checkpoint_meta={
+            "shard": shard_id,
+            "shards": n_shards,
+            "shard_by": shard_by,
+        },
+    )
+
+    # SIGTERM to the whole process group → leave the loop, checkpoint.
+    # Ctrl+C is handled by the parent (sentinel via stop()).
+    signal.signal(signal.SIGTERM, _raise_system_exit)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    try:
+        _shard_loop(shard_id, processor, window_slots, jobs, free_slots,
+                    processed, max_batch, report)
+    except SystemExit:
+        pass
+    finally:
+        processor.close()
+        publisher.close()
+        report(force=True)
+        window_slots.close()
+
+
+def _raise_system_exit(signum, frame):
+    raise SystemExit(0)
+
+
+def _shard_loop(shard_id, processor, window_slots, jobs, free_slots,
+                processed, max_batch, report):
+    running = True
+    while running:
+        batch = [jobs.get()]
+
+        # Drain whatever else is already queued → one batched L1 call
+        while len(batch) < max_batch:
+            try:
+                batch.append(jobs.get_nowait())
+            except queue.Empty:
+                break
+
+        if batch[-1] is None:
+            batch.pop()
+            running = False
+        if not batch:
+            continue
+
+        # One gather out of shared memory, then the slots go back to ingest
+        windows = window_slots.block[[job[0] for job in batch]]
+        for job in batch:
+            free_slots.put(job[0])
+
+        time_stats = [job[4] for job in batch]
+        if any(stats is None for stats in time_stats):
+            time_stats = None
+
+        try:
+            results, seqs = processor.compute_l1_batch(
+                windows,
+                time_stats=time_stats,
+                keys=[(job[1], job[2]) for job in batch],
+                speeds=[job[3].get("speed") for job in batch],
+                with_seq=True,
+            )
+
+            processor.process_batch([
+                (asset_id, point, raw_meta, window, l1_features)
+                for (_, asset_id, point, raw_meta, _), window, l1_features in zip(
+                    batch, windows, results
+                )
+            ], window_seqs=seqs)
+        except Exception:
+            log.exception("[SHARD %s] Window processing failed", shard_id)
+        finally:
+            with processed.get_lock():
+                processed[shard_id] += len(batch)
+            report()
+
+
+class ShardedExecutor:
+    """
+    Multi-process execution mode.
+
+    Points are hashed by asset:point (or by asset, ``shard_by="asset"``)
+    to N worker processes, so all per-point state stays local to one
+    worker and windows of a point are processed in arrival order.
+    Windows are handed over through shared-memory slots (one pool per
+    shard); only the slot index and the small payload metadata go
+    through the job queue.
+
+    When a shard has no free slot, ``submit`` blocks — backpressure
+    towards ingest instead of unbounded memory growth.
+
+    Each worker keeps its own Heartbeat and reports it back; ``stats``
+    sums the L1 / L2 counters and lists the per-shard sections,
+    ``publish_stats`` merges the shards' publish policies.
+    """
+
+    SHARD_COUNTERS = ("l1_exec_count", "l2_exec_count")
+    SHARD_SOURCES = ("l2", "spectral_cache", "checkpoint")
+
+    def __init__(self, config: dict, workers: int, window_size: int,
+                 slots_per_worker: int = 8, max_batch: int = 8,
+                 dtype=np.float64, shard_by: str = "point"):
+        if shard_by not in ("point", "asset"):
+            raise ValueError(f"Unknown shard_by {shard_by!r}")
+
+        self.n_shards = max(int(workers), 1)
+        self.shard_by = shard_by
+        self.window_size = window_size
+        self.dtype = np.dtype(dtype)
+
+        ctx = mp.get_context("spawn")
+
+        self._processed = ctx.Array("q", self.n_shards)
+        # (shard_id, heartbeat snapshot) from the workers
+        self._reports = ctx.Queue()
+        self._reports_lock = threading.Lock()
+        self._shard_stats = [None] * self.n_shards
+        self._dispatched = [0] * self.n_shards
+        self._slots = []
+        self._free = []
+        self._jobs = []
+        self._procs = []
+
+        for shard_id in range(self.n_shards):
+            window_slots = _WindowSlots(slots_per_worker, window_size, self.dtype)
+            free_slots = ctx.Queue()
+            for slot in range(slots_per_worker):
+                free_slots.put(slot)
+            jobs = ctx.Queue()
+
+            proc = ctx.Process(
+                target=_shard_main,
+                args=(
+                    shard_id, self.n_shards, shard_by, config, window_slots.name,
+                    slots_per_worker, window_size, self.dtype.str, jobs,
+                    free_slots, self._processed, self._reports, max_batch,
+                ),
+                name=f"vibralyzer-shard-{shard_id}",
+                daemon=True,
+            )
+            proc.start()
+
+            self._slots.append(window_slots)
+            self._free.append(free_slots)
+            self._jobs.append(jobs)
+            self._procs.append(proc)
+
+        log.info("[SHARD] %d worker processes started | by %s",
+                 self.n_shards, shard_by)
+
+    def submit(self, asset_id, point, raw_payload, window, time_stats=None):
+        shard_id = shard_for(asset_id, point, self.n_shards, by=self.shard_by)
+
+        slot = self._free[shard_id].get()
+        self._slots[shard_id].block[slot] = window
+
+        # Samples travel via shared memory, not through the pickle
+        raw_meta = {k: v for k, v in raw_payload.items() if k != "acceleration"}
+
+        self._jobs[shard_id].put((slot, asset_id, point, raw_meta, time_stats))
+        self._dispatched[shard_id] += 1
+
+    def _collect_reports(self):
+        """
+        Latest heartbeat snapshot per shard (None until it reported)
+        """
+        with self._reports_lock:
+            while True:
+                try:
+                    shard_id, snapshot = self._reports.get_nowait()
+                except queue.Empty:
+                    break
+                self._shard_stats[shard_id] = snapshot
+            return list(self._shard_stats)
+
+    def stats(self) -> dict:
+        processed = list(self._processed)
+        reports = [r for r in self._collect_reports() if r is not None]
+        return {
+            "workers": self.n_shards,
+            "shard_by": self.shard_by,
+            "alive": sum(p.is_alive() for p in self._procs),
+            "windows_dispatched": sum(self._dispatched),
+            "windows_processed": sum(processed),
+            "backlog_per_worker": [
+                d - p for d, p in zip(self._dispatched, processed)
+            ],
+            # summed over the shards' heartbeats
+            **{
+                counter: sum(r[counter] for r in reports)
+                for counter in self.SHARD_COUNTERS
+            },
+            "shards": [
+                {name: r[name] for name in self.SHARD_SOURCES if name in r}
+                for r in reports
+            ],
+        }
+
+    def publish_stats(self) -> dict:
+        """
+        Publish policy stats summed over the shards' publishers
+        """
+        from publish.mqtt_publisher import merge_publish_stats
+
+        return merge_publish_stats(
+            r["publish"] for r in self._collect_reports() if r is not None
+        )
+
+    def stop(self, timeout: float = 5.0):
+        for jobs in self._jobs:
+            jobs.put(None)
+        for proc in self._procs:
+            proc.join(timeout)
+        for window_slots in self._slots:
+            window_slots.close()
+            window_slots.shm.unlink()
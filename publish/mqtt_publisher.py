@@ -1,17 +1,316 @@
 import json
 import logging
+import numbers
+import threading
+import time
+
+import numpy as np
 import paho.mqtt.client as mqtt
 
 log = logging.getLogger(__name__)
 
+# Per-point topic classes (coalesced into one message per asset)
+POINT_CLASSES = (
+    "scada",
+    "health_alarm",
+    "interpretation",
+    "recommendation",
+    "early_fault",
+)
+ASSET_TOPIC = "vibration/asset/{asset}"
+
+
+# ==================================================
+# ENCODING
+# ==================================================
+def _plain(value):
+    """
+    numpy scalars / arrays → Python values (encoder fallback)
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Not serializable: {type(value).__name__}")
+
+
+def _json_encoder():
+    encoder = json.JSONEncoder(
+        ensure_ascii=False, separators=(",", ":"), default=_plain
+    )
+    return lambda payload: encoder.encode(payload).encode("utf-8")
+
+
+def make_encoder(name: str = "auto"):
+    """
+    Payload → bytes.
+    json | orjson | msgpack | cbor; auto = orjson when installed, else json.
+    orjson / msgpack / cbor2 are optional (ImportError when requested
+    explicitly but not installed).
+    """
+    if name == "auto":
+        try:
+            return make_encoder("orjson")
+        except ImportError:
+            return make_encoder("json")
+
+    if name == "json":
+        return _json_encoder()
+
+    if name == "orjson":
+        import orjson  # optional dependency
+
+        option = orjson.OPT_SERIALIZE_NUMPY
+        return lambda payload: orjson.dumps(payload, default=_plain, option=option)
+
+    if name == "msgpack":
+        import msgpack  # optional dependency
+
+        packer = msgpack.Packer(default=_plain, use_bin_type=True)
+        return packer.pack
+
+    if name == "cbor":
+        import cbor2  # optional dependency
+
+        return lambda payload: cbor2.dumps(payload, default=_cbor_default)
+
+    raise ValueError(f"Unknown encoding {name!r}")
+
+
+def _cbor_default(encoder, value):
+    encoder.encode(_plain(value))
+
+
+# ==================================================
+# REPORT BY EXCEPTION
+# ==================================================
+class PublishPolicy:
+    """
+    Per topic class publish rules with a per-point last-sent cache.
+
+    Rule keys (classes without a rule are always published):
+    - on_change       : fields (dotted paths, e.g. context.state); publish
+                        when any differs from the last sent message
+    - deadband_abs /
+      deadband_pct    : publish when a numeric field moved more than
+                        max(deadband_abs, deadband_pct % of the last sent
+                        value) or any other field changed; ``fields``
+                        limits the compared fields (default: all
+                        top-level values except timestamp)
+    - max_interval_sec: publish anyway once this old (refresh)
+    """
+
+    IGNORED = ("timestamp",)
+
+    def __init__(self, rules: dict = None):
+        self.rules = rules or {}
+        self._last = {}               # (class, asset, point) → (ts, snapshot)
+        self._lock = threading.Lock()
+        self._sent = {}
+        self._suppressed = {}
+
+    @classmethod
+    def from_config(cls, cfg: dict):
+        """
+        publish: {mode: always | exception, classes: {class: rule}}
+        """
+        cfg = cfg or {}
+        if cfg.get("mode", "always") != "exception":
+            return cls()
+        return cls(cfg.get("classes") or {})
+
+    def should_publish(self, topic_class, asset, point, payload) -> bool:
+        rule = self.rules.get(topic_class)
+        if rule is None:
+            self._count(self._sent, topic_class)
+            return True
+
+        snapshot = self._snapshot(rule, payload)
+        key = (topic_class, asset, point)
+        now = time.time()
+
+        with self._lock:
+            last = self._last.get(key)
+            publish = (
+                last is None
+                or now - last[0] >= rule.get("max_interval_sec", float("inf"))
+                or self._changed(rule, last[1], snapshot)
+            )
+            if publish:
+                self._last[key] = (now, snapshot)
+            self._count(self._sent if publish else self._suppressed, topic_class)
+        return publish
+
+    def _snapshot(self, rule, payload):
+        if "on_change" in rule:
+            return {path: _lookup(payload, path) for path in rule["on_change"]}
+
+        fields = rule.get("fields")
+        if fields is not None:
+            return {name: payload.get(name) for name in fields}
+        return {
+            name: value
+            for name, value in payload.items()
+            if name not in self.IGNORED
+        }
+
+    def _changed(self, rule, last, snapshot):
+        if "on_change" in rule or last.keys() != snapshot.keys():
+            return last != snapshot
+
+        deadband_abs = rule.get("deadband_abs", 0.0)
+        deadband_pct = rule.get("deadband_pct", 0.0) / 100.0
+        for name, value in snapshot.items():
+            old = last[name]
+            if _is_number(value) and _is_number(old):
+                if abs(value - old) > max(deadband_abs, deadband_pct * abs(old)):
+                    return True
+            elif value != old:
+                return True
+        return False
+
+    def _count(self, counter, topic_class):
+        counter[topic_class] = counter.get(topic_class, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            classes = {}
+            for topic_class in sorted(set(self._sent) | set(self._suppressed)):
+                classes[topic_class] = _class_stats(
+                    self._sent.get(topic_class, 0),
+                    self._suppressed.get(topic_class, 0),
+                )
+        return {
+            "mode": "exception" if self.rules else "always",
+            "classes": classes,
+        }
+
+
+def _class_stats(sent, suppressed):
+    total = sent + suppressed
+    return {
+        "sent": sent,
+        "suppressed": suppressed,
+        "suppression_ratio": round(suppressed / total, 3) if total else 0.0,
+    }
+
+
+def merge_publish_stats(stats_list) -> dict:
+    """
+    Several MQTTPublisher.stats() (e.g. one per shard) → one, summed
+    per topic class
+    """
+    merged = {}
+    counts = {}
+    asset_messages = asset_bytes = 0
+    for stats in stats_list:
+        merged.update(
+            {k: v for k, v in stats.items() if k in ("mode", "output", "encoding")}
+        )
+        for topic_class, c in stats["classes"].items():
+            total = counts.setdefault(topic_class, [0, 0])
+            total[0] += c["sent"]
+            total[1] += c["suppressed"]
+        if "asset_messages" in stats:
+            asset_messages += stats["asset_messages"]
+            asset_bytes += stats["asset_bytes_avg"] * stats["asset_messages"]
+
+    merged["classes"] = {
+        topic_class: _class_stats(sent, suppressed)
+        for topic_class, (sent, suppressed) in sorted(counts.items())
+    }
+    if "encoding" in merged:
+        merged["asset_messages"] = asset_messages
+        merged["asset_bytes_avg"] = (
+            round(asset_bytes / asset_messages) if asset_messages else 0
+        )
+    return merged
+
+
+def _lookup(payload, path):
+    value = payload
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
 
 class MQTTPublisher:
-    def __init__(self, broker: str, port: int):
+    """
+    Output modes:
+    - per_point: one message per point and topic class (default)
+    - asset    : messages buffered per asset, flushed every ``tick_ms``
+                 as ONE message on vibration/asset/{asset}
+                 {"asset", "timestamp", "points": {point: {class: payload}}}
+                 (latest payload per point and class wins); classes in
+                 ``compat_classes`` are also sent on their per-point topics
+    - both     : asset messages + every per-point topic
+
+    Per-point topics keep the plain json.dumps payloads; only asset
+    messages use ``encoding``.
+    """
+
+    def __init__(
+        self,
+        broker: str,
+        port: int,
+        policy: PublishPolicy = None,
+        output: str = "per_point",
+        encoding: str = "auto",
+        tick_ms: float = 1000,
+        compat_classes=(),
+    ):
+        if output not in ("per_point", "asset", "both"):
+            raise ValueError(f"Unknown output mode {output!r}")
+
         self.client = mqtt.Client()
         self.client.connect(broker, port)
         self.client.loop_start()
 
-        log.info("[MQTT] Connected to %s:%s", broker, port)
+        # report-by-exception filter (default: publish everything)
+        self.policy = policy or PublishPolicy()
+
+        self._topics = {}             # (class, asset, point) → topic
+
+        # === ASSET COALESCING ===
+        self.output = output
+        self.encoding = encoding
+        self._point_topics = output != "asset"
+        self._compat = frozenset(compat_classes)
+        self._pending = {}            # asset → {point: {class: payload}}
+        self._pending_lock = threading.Lock()
+        self._asset_messages = 0
+        self._asset_bytes = 0
+        self._ticker = None
+
+        if output != "per_point":
+            self._encode_asset = make_encoder(encoding)
+            self._tick_sec = tick_ms / 1000.0
+            self._stop = threading.Event()
+            self._ticker = threading.Thread(
+                target=self._tick_loop, name="mqtt-asset-flush", daemon=True
+            )
+            self._ticker.start()
+
+        log.info("[MQTT] Connected to %s:%s | output=%s", broker, port, output)
+
+    @classmethod
+    def from_config(cls, config: dict):
+        publish_cfg = config.get("publish") or {}
+        return cls(
+            broker=config["mqtt"]["broker"],
+            port=config["mqtt"]["port"],
+            policy=PublishPolicy.from_config(publish_cfg),
+            output=publish_cfg.get("output", "per_point"),
+            encoding=publish_cfg.get("encoding", "auto"),
+            tick_ms=publish_cfg.get("tick_ms", 1000),
+            compat_classes=publish_cfg.get("compat_classes", ()),
+        )
 
     # ==================================================
     # INTERNAL SINGLE SOURCE OF TRUTH
@@ -22,41 +321,111 @@ class MQTTPublisher:
         except Exception:
             log.exception("[MQTT] Publish failed | topic=%s", topic)
 
+    def _topic(self, topic_class, asset, point):
+        key = (topic_class, asset, point)
+        topic = self._topics.get(key)
+        if topic is None:
+            topic = self._topics[key] = f"vibration/{topic_class}/{asset}/{point}"
+        return topic
+
+    def _offer(self, topic_class, asset, point, payload):
+        """
+        Per-point message → per-point topic and / or the asset buffer,
+        unless the policy suppresses it
+        """
+        if not self.policy.should_publish(topic_class, asset, point, payload):
+            return
+
+        if self._ticker is not None:
+            with self._pending_lock:
+                points = self._pending.setdefault(asset, {})
+                points.setdefault(point, {})[topic_class] = payload
+
+        if self._point_topics or topic_class in self._compat:
+            self._publish(self._topic(topic_class, asset, point), payload)
+
+    # ==================================================
+    # ASSET MESSAGES (COALESCED)
+    # ==================================================
+    def _tick_loop(self):
+        while not self._stop.wait(self._tick_sec):
+            self.flush()
+
+    def flush(self):
+        """
+        Publish one message per asset with everything buffered since the
+        last tick
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+
+        now = time.time()
+        for asset, points in pending.items():
+            topic = ASSET_TOPIC.format(asset=asset)
+            try:
+                data = self._encode_asset(
+                    {"asset": asset, "timestamp": now, "points": points}
+                )
+                self.client.publish(topic, data)
+            except Exception:
+                log.exception("[MQTT] Publish failed | topic=%s", topic)
+                continue
+            self._asset_messages += 1
+            self._asset_bytes += len(data)
+
+    def close(self):
+        if self._ticker is not None:
+            self._stop.set()
+            self._ticker.join(timeout=5)
+            self.flush()
+
+    def stats(self) -> dict:
+        stats = self.policy.stats()
+        stats["output"] = self.output
+        if self._ticker is not None:
+            stats["encoding"] = self.encoding
+            stats["asset_messages"] = self._asset_messages
+            stats["asset_bytes_avg"] = (
+                round(self._asset_bytes / self._asset_messages)
+                if self._asset_messages else 0
+            )
+        return stats
+
     # ==================================================
     # SCADA VALUES
     # ==================================================
     def publish_scada(self, asset, point, payload):
-        self._publish(f"vibration/scada/{asset}/{point}", payload)
+        self._offer("scada", asset, point, payload)
 
     # ==================================================
     # FINAL HEALTH ALARM
     # ==================================================
     def publish_health_alarm(self, asset, point, payload):
-        self._publish(f"vibration/health_alarm/{asset}/{point}", payload)
+        self._offer("health_alarm", asset, point, payload)
 
     # ==================================================
     # INTERPRETATION (WHY)
     # ==================================================
     def publish_interpretation(self, asset, point, payload):
-        self._publish(f"vibration/interpretation/{asset}/{point}", payload)
+        self._offer("interpretation", asset, point, payload)
 
     # ==================================================
     # RECOMMENDATION (WHAT)
     # ==================================================
     def publish_recommendation(self, asset, point, payload):
-        self._publish(f"vibration/recommendation/{asset}/{point}", payload)
+        self._offer("recommendation", asset, point, payload)
 
     # ==================================================
     # EARLY FAULT (FSM / EVIDENCE)
     # ==================================================
     def publish_early_fault(self, asset, point, payload):
-        self._publish(f"vibration/early_fault/{asset}/{point}", payload)
+        self._offer("early_fault", asset, point, payload)
 
     # ==================================================
     # L2 DIAGNOSTIC
     # ==================================================
     def publish_l2_result(self, asset, point, payload):
-        self._publish(f"vibration/l2_result/{asset}/{point}", payload)
+        self._publish(self._topic("l2_result", asset, point), payload)
 
     # ==================================================
     # HEARTBEAT
@@ -0,0 +1,148 @@
+import logging
+import threading
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+
+class PointQueueDispatcher:
+    """
+    Bounded per-point queues between the MQTT network thread and the
+    processing pipeline.
+
+    The listener only decodes and calls ``submit``; a pool of worker
+    threads drains the queues. A point is handled by at most one worker
+    at a time, so its messages are processed in arrival order.
+
+    Overflow policy (per point queue full):
+    - drop_oldest : discard the oldest queued message
+    - coalesce    : discard everything queued, keep only the newest
+    - block       : wait for room (backpressure onto the network thread)
+    """
+
+    POLICIES = ("drop_oldest", "coalesce", "block")
+
+    def __init__(self, callback, workers: int = 2, maxsize: int = 8,
+                 policy: str = "drop_oldest"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+
+        self.callback = callback
+        self.workers = max(int(workers), 1)
+        self.maxsize = max(int(maxsize), 1)
+        self.policy = policy
+
+        self._queues = {}         # key -> deque of (asset, point, payload)
+        self._ready = deque()     # keys with pending work, not in progress
+        self._active = set()      # keys queued in _ready or being processed
+
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._space = threading.Condition(self._lock)
+
+        self._threads = []
+        self._running = False
+
+        # ---- COUNTERS ----
+        self.enqueued_count = 0
+        self.processed_count = 0
+        self.dropped_count = 0
+        self.max_depth_seen = 0
+
+    def _key(self, asset, point):
+        return f"{asset}:{point}"
+
+    # ==================================================
+    # NETWORK THREAD SIDE
+    # ==================================================
+    def submit(self, asset_id, point, raw_payload):
+        key = self._key(asset_id, point)
+
+        with self._lock:
+            q = self._queues.get(key)
+            if q is None:
+                q = self._queues[key] = deque()
+
+            if len(q) >= self.maxsize:
+                if self.policy == "block":
+                    while len(q) >= self.maxsize and self._running:
+                        self._space.wait()
+                elif self.policy == "coalesce":
+                    self.dropped_count += len(q)
+                    q.clear()
+                else:
+                    q.popleft()
+                    self.dropped_count += 1
+
+            q.append((asset_id, point, raw_payload))
+            self.enqueued_count += 1
+            self.max_depth_seen = max(self.max_depth_seen, len(q))
+
+            if key not in self._active:
+                self._active.add(key)
+                self._ready.append(key)
+                self._work.notify()
+
+    # ==================================================
+    # WORKER SIDE
+    # ==================================================
+    def start(self):
+        if self._threads:
+            return
+
+        self._running = True
+        for i in range(self.workers):
+            t = threading.Thread(
+                target=self._run, name=f"ingest-worker-{i}", daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._ready and self._running:
+                    self._work.wait()
+                if not self._running:
+                    return
+
+                key = self._ready.popleft()
+                asset_id, point, raw_payload = self._queues[key].popleft()
+                self._space.notify_all()
+
+            try:
+                self.callback(asset_id, point, raw_payload)
+            except Exception:
+                log.exception("[INGEST] Processing failed | %s", key)
+
+            with self._lock:
+                self.processed_count += 1
+                if self._queues[key]:
+                    self._ready.append(key)
+                    self._work.notify()
+                else:
+                    self._active.discard(key)
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._work.notify_all()
+            self._space.notify_all()
+
+    # ==================================================
+    # HEARTBEAT
+    # ==================================================
+    def stats(self) -> dict:
+        with self._lock:
+            depth = {key: len(q) for key, q in self._queues.items()}
+
+        return {
+            "policy": self.policy,
+            "workers": self.workers,
+            "queue_depth": sum(depth.values()),
+            "queue_depth_max": max(depth.values(), default=0),
+            "queue_depth_peak": self.max_depth_seen,
+            "enqueued": self.enqueued_count,
+            "processed": self.processed_count,
+            "dropped": self.dropped_count,
+        }
@@ -1,6 +1,7 @@
-import json
 import paho.mqtt.client as mqtt
 
+from raw_ingest.raw_codec import decode_raw_payload
+
 
 def start_mqtt_listener(
     callback,
@@ -10,6 +11,9 @@ def start_mqtt_listener(
 ):
     """
     Generic MQTT listener for raw vibration data
+
+    Runs on paho's network thread: ``callback`` must return quickly
+    (e.g. PointQueueDispatcher.submit), never run the pipeline itself.
     """
 
     def on_connect(client, userdata, flags, rc):
@@ -23,7 +27,8 @@ def start_mqtt_listener(
 
     def on_message(client, userdata, msg):
         try:
-            payload = json.loads(msg.payload.decode())
+            # Binary frame (zero-copy) or legacy JSON
+            payload = decode_raw_payload(msg.payload)
             asset, point = _parse_topic(msg.topic)
 
             callback(
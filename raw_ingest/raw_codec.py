@@ -0,0 +1,150 @@
+import json
+import math
+import struct
+import time
+
+import numpy as np
+
+# ==================================================
+# BINARY RAW FRAME (v1)
+# ==================================================
+# Little endian, one frame per MQTT message:
+#
+#   magic        4s   b"VBR1"
+#   version      B
+#   dtype        B    1=int16, 2=float32
+#   header_len   H    bytes before the sample block (8-byte aligned)
+#   timestamp    d    epoch seconds
+#   fs           f    Hz
+#   scale        f    g per count (int16) / 1.0 (float32)
+#   temperature  f    °C   (NaN = not reported)
+#   speed        f    rpm  (NaN = not reported)
+#   n_samples    I
+#   asset_len    B  + asset  (utf-8)
+#   point_len    B  + point  (utf-8)
+#   padding           up to header_len
+#   samples      n_samples x dtype
+# ==================================================
+
+MAGIC = b"VBR1"
+VERSION = 1
+
+_FIXED = struct.Struct("<4sBBHdffffI")
+
+_DTYPE_CODES = {
+    "int16": 1,
+    "float32": 2,
+}
+_CODE_DTYPES = {
+    1: np.dtype("<i2"),
+    2: np.dtype("<f4"),
+}
+
+
+def is_binary_frame(data: bytes) -> bool:
+    return data[:4] == MAGIC
+
+
+def encode_raw_frame(
+    asset: str,
+    point: str,
+    samples,
+    fs: float,
+    timestamp: float | None = None,
+    temperature: float | None = None,
+    speed: float | None = None,
+    dtype: str = "int16",
+    scale: float | None = None,
+) -> bytes:
+    """
+    samples: acceleration in g.
+    int16 uses ``scale`` g/count (default: full scale of this frame).
+    """
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"Unsupported raw dtype: {dtype}")
+
+    acc = np.asarray(samples, dtype=np.float64)
+
+    if dtype == "int16":
+        if scale is None:
+            peak = float(np.max(np.abs(acc))) if acc.size else 0.0
+            scale = peak / 32767.0 if peak > 0 else 1.0
+        block = np.clip(np.rint(acc / scale), -32768, 32767).astype("<i2")
+    else:
+        scale = 1.0
+        block = acc.astype("<f4")
+
+    asset_b = asset.encode("utf-8")
+    point_b = point.encode("utf-8")
+
+    names = (
+        struct.pack("<B", len(asset_b)) + asset_b
+        + struct.pack("<B", len(point_b)) + point_b
+    )
+    header_len = _FIXED.size + len(names)
+    header_len += -header_len % 8
+
+    fixed = _FIXED.pack(
+        MAGIC,
+        VERSION,
+        _DTYPE_CODES[dtype],
+        header_len,
+        time.time() if timestamp is None else timestamp,
+        fs,
+        scale,
+        math.nan if temperature is None else temperature,
+        math.nan if speed is None else speed,
+        block.size,
+    )
+
+    header = (fixed + names).ljust(header_len, b"\0")
+    return header + block.tobytes()
+
+
+def decode_raw_frame(data: bytes) -> dict:
+    """
+    Zero-copy decode: ``acceleration`` is an np.frombuffer view on the
+    message bytes (raw counts for int16, with ``scale`` g/count).
+    """
+    (
+        magic, version, dtype_code, header_len,
+        timestamp, fs, scale, temperature, speed, n_samples,
+    ) = _FIXED.unpack_from(data, 0)
+
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Unsupported raw frame: {magic!r} v{version}")
+
+    dtype = _CODE_DTYPES.get(dtype_code)
+    if dtype is None:
+        raise ValueError(f"Unsupported raw dtype code: {dtype_code}")
+
+    offset = _FIXED.size
+    asset_len = data[offset]
+    asset = bytes(data[offset + 1:offset + 1 + asset_len]).decode("utf-8")
+    offset += 1 + asset_len
+    point_len = data[offset]
+    point = bytes(data[offset + 1:offset + 1 + point_len]).decode("utf-8")
+
+    acceleration = np.frombuffer(
+        data, dtype=dtype, count=n_samples, offset=header_len
+    )
+
+    return {
+        "asset": asset,
+        "point": point,
+        "timestamp": timestamp,
+        "fs": fs,
+        "acceleration": acceleration,
+        "scale": scale if dtype.kind == "i" else None,
+        "temperature": None if math.isnan(temperature) else temperature,
+        "speed": None if math.isnan(speed) else speed,
+    }
+
+
+def decode_raw_payload(data: bytes) -> dict:
+    """
+    Auto-detect binary frame vs. legacy JSON on the same topic tree.
+    """
+    if is_binary_frame(data):
+        return decode_raw_frame(data)
+    return json.loads(data.decode())
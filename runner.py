@@ -1,66 +1,32 @@
+import signal
 import time
+import threading
+
+import numpy as np
 
 from raw_ingest.mqtt_listener import start_mqtt_listener
+from raw_ingest.dispatcher import PointQueueDispatcher
 from core.ring_buffer import RingBufferManager
-from core.l1_feature_pipeline import L1FeaturePipeline
-
-from early_fault.trend_detector import TrendDetector
-from early_fault.persistence import PersistenceChecker
-from early_fault.scoring import EarlyFaultFSM
-from early_fault.baseline import AdaptiveBaseline
+from core.window_batch import WindowBatch
 
 from publish.mqtt_publisher import MQTTPublisher
 from config.config_loader import load_config
 
-from diagnostic_l2.cooldown import L2CooldownManager
-from diagnostic_l2.l2_queue import L2JobQueue
-from diagnostic_l2.worker import l2_worker
-
-from analytics.interpretation.interpretation_engine import InterpretationEngine
-from analytics.recommendation.recommendation_engine import RecommendationEngine
+from execution.point_processor import (  # noqa: F401 (re-exported)
+    PointProcessor,
+    phi_to_state,
+    compute_point_health_index,
+)
+from execution.sharding import ShardedExecutor
 from utils.heartbeat import Heartbeat
 
 
-# ==================================================
-# PHI → STATE (FINAL AUTHORITY)
-# ==================================================
-def phi_to_state(phi: float) -> str:
-    if phi >= 90:
-        return "NORMAL"
-    elif phi >= 75:
-        return "WATCH"
-    elif phi >= 55:
-        return "WARNING"
-    else:
-        return "ALARM"
-
-
-# ==================================================
-# POINT HEALTH INDEX (PHYSICS-BASED)
-# ==================================================
-def compute_point_health_index(l1_features):
-    vel = min(l1_features["overall_vel_rms_mm_s"] / 7.1, 1.0)
-    env = min(l1_features["envelope_rms"] / 0.35, 1.0)
-    crest = min(l1_features["crest_factor"] / 6.0, 1.0)
-
-    severity = 0.5 * vel + 0.3 * env + 0.2 * crest
-    phi = 100.0 * (1.0 - severity)
-
-    return round(max(min(phi, 100.0), 0.0), 1)
-
-
 def main():
     # =========================
     # LOAD CONFIG
     # =========================
     config = load_config()
 
-    # =========================
-    # ENGINES
-    # =========================
-    interpretation_engine = InterpretationEngine()
-    recommendation_engine = RecommendationEngine()
-
     # =========================
     # HEARTBEAT
     # =========================
@@ -69,53 +35,98 @@ def main():
     HEARTBEAT_INTERVAL = config.get("heartbeat", {}).get("interval_sec", 10)
 
     # =========================
-    # BASELINE
+    # CORE PIPELINE
+    # l1_feature.dtype = compute precision from ring buffer to L1
     # =========================
-    baseline = AdaptiveBaseline(
-        alpha=config.get("baseline", {}).get("alpha", 0.01),
-        min_samples=config.get("baseline", {}).get("min_samples", 100),
-    )
+    l1_dtype = np.dtype(config["l1_feature"].get("dtype", "float64"))
 
-    # =========================
-    # L2 SYSTEM
-    # =========================
-    l2_cooldown = L2CooldownManager(
-        warning_sec=config["l2"]["cooldown_warning_sec"],
-        alarm_sec=config["l2"]["cooldown_alarm_sec"],
+    ring_buffers = RingBufferManager(
+        window_size=config["raw"]["window_size"],
+        hop_size=config["raw"].get("hop_size"),
+        overlap=config["raw"].get("overlap"),
+        point_overrides=config["raw"].get("points"),
+        dtype=l1_dtype,
+        streaming_stats=config["l1_feature"].get("streaming_stats", False),
+        fs=config["l1_feature"]["sampling_rate"],
+        stats_resync_every=config["l1_feature"].get("stats_resync_every", 256),
     )
 
-    l2_queue = L2JobQueue(maxsize=10)
-    l2_queue.start(l2_worker)
+    publisher = MQTTPublisher.from_config(config)
 
     # =========================
-    # CORE PIPELINE
+    # EXECUTION MODE
+    # inline  → processed on the ingest worker threads (default)
+    # sharded → points hashed to worker processes
     # =========================
-    ring_buffers = RingBufferManager(
-        window_size=config["raw"]["window_size"]
-    )
-
-    l1_pipeline = L1FeaturePipeline(
-        fs=config["l1_feature"]["sampling_rate"],
-        rpm=config["l1_feature"]["rpm_default"],
-    )
-
-    trend_detector = TrendDetector()
-    persistence_checker = PersistenceChecker()
+    execution_cfg = config.get("execution", {})
+    sharded = execution_cfg.get("mode", "inline") == "sharded"
+
+    if sharded:
+        # coalesced per-asset output needs every point of an asset in
+        # one shard (one publisher → one message per asset)
+        coalesced = config.get("publish", {}).get("output", "per_point") != "per_point"
+        executor = ShardedExecutor(
+            config,
+            workers=execution_cfg.get("workers", 2),
+            window_size=config["raw"]["window_size"],
+            slots_per_worker=execution_cfg.get("slots_per_worker", 8),
+            max_batch=config["l1_feature"].get("batch_max_points", 16),
+            dtype=l1_dtype,
+            shard_by="asset" if coalesced else "point",
+        )
+        heartbeat.register_source("sharding", executor.stats)
+        # sent / suppressed per topic class, summed over the shards
+        heartbeat.register_source("publish", executor.publish_stats)
+        processor = None
+    else:
+        executor = None
+        processor = PointProcessor(config, publisher=publisher, heartbeat=heartbeat)
+        # sent / suppressed per topic class (report-by-exception)
+        heartbeat.register_source("publish", publisher.stats)
 
-    early_fault_fsm = EarlyFaultFSM(
-        watch_persistence=config["early_fault"]["watch_persistence"],
-        warning_persistence=config["early_fault"]["warning_persistence"],
-        alarm_persistence=config["early_fault"]["alarm_persistence"],
-        hysteresis_clear=config["early_fault"]["hysteresis_clear"],
+    # =========================
+    # L1 BATCHING (OPTIONAL, INLINE MODE)
+    # batch_tick_ms = 0 → compute every window immediately
+    # =========================
+    batch_tick_ms = config["l1_feature"].get("batch_tick_ms", 0)
+    window_batch = (
+        WindowBatch(
+            window_size=config["raw"]["window_size"],
+            max_points=config["l1_feature"].get("batch_max_points", 16),
+            tick_sec=batch_tick_ms / 1000.0,
+            dtype=l1_dtype,
+        )
+        if batch_tick_ms > 0 and not sharded
+        else None
     )
+    batch_lock = threading.Lock()
+    heartbeat_lock = threading.Lock()
+
+    def flush_batch():
+        windows, meta = window_batch.drain()
+
+        time_stats = [m[3] for m in meta]
+        if any(stats is None for stats in time_stats):
+            time_stats = None
+
+        results, seqs = processor.compute_l1_batch(
+            windows,
+            time_stats=time_stats,
+            keys=[(m[0], m[1]) for m in meta],
+            speeds=[m[2].get("speed") for m in meta],
+            with_seq=True,
+        )
 
-    publisher = MQTTPublisher(
-        broker=config["mqtt"]["broker"],
-        port=config["mqtt"]["port"],
-    )
+        processor.process_batch([
+            (asset_id, point, raw_payload, window, l1_features)
+            for window, l1_features, (asset_id, point, raw_payload, _) in zip(
+                windows, results, meta
+            )
+        ], window_seqs=seqs)
 
     # =========================
-    # RAW CALLBACK
+    # RAW CALLBACK (INGEST WORKER THREADS)
+    # A point is never processed by two workers at once.
     # =========================
     def on_raw_data(asset_id, point, raw_payload):
         nonlocal last_heartbeat_ts
@@ -123,183 +134,91 @@ def main():
         heartbeat.mark_raw_rx()
         ring_buffers.append(asset_id, point, raw_payload)
 
-        if not ring_buffers.is_window_ready(asset_id, point):
-            return
-
-        heartbeat.mark_window_ready()
-        window = ring_buffers.get_window(asset_id, point)
-
-        heartbeat.mark_l1_exec()
-        l1_features = l1_pipeline.compute(window)
-
-        raw_trend = trend_detector.update(asset_id, point, l1_features)
-
-        baseline.update(
-            asset_id,
-            point,
-            l1_features,
-            allow_update=(raw_trend.level == "NORMAL"),
-        )
-
-        persistence = persistence_checker.update(asset_id, point, raw_trend)
-
-        early_fault = early_fault_fsm.update(
-            asset=asset_id,
-            point=point,
-            trend=raw_trend,
-            persistence=persistence,
-        )
-
-        # =========================
-        # FINAL HEALTH DECISION
-        # =========================
-        phi = compute_point_health_index(l1_features)
-        state = phi_to_state(phi)
-
-        fault_type = (
-            "GENERAL_HEALTH"
-            if state in ("NORMAL", "WATCH")
-            else early_fault.dominant_feature or "GENERAL_HEALTH"
-        )
-
-        # =========================
-        # INTERPRETATION (WHY)
-        # =========================
-        interpretation = interpretation_engine.interpret(
-            asset=asset_id,
-            point=point,
-            l1_features=l1_features,
-            trend=raw_trend,
-            early_fault=early_fault,
-            phi=phi,
-            state=state,
-        )
-
-        # =========================
-        # RECOMMENDATION (WHAT TO DO)
-        # =========================
-        recommendation = recommendation_engine.recommend(
-            fault_type=fault_type,
-            state=state,
-            lang="id",
-        )
+        if ring_buffers.is_window_ready(asset_id, point):
+            heartbeat.mark_window_ready()
+            window = ring_buffers.get_window(asset_id, point)
+            time_stats = ring_buffers.get_time_stats(asset_id, point)
+
+            if executor is not None:
+                executor.submit(asset_id, point, raw_payload, window, time_stats)
+            elif window_batch is not None:
+                with batch_lock:
+                    window_batch.add(window, (asset_id, point, raw_payload, time_stats))
+            else:
+                l1_features, window_seq = processor.compute_l1(
+                    window,
+                    time_stats=time_stats,
+                    asset_id=asset_id,
+                    point=point,
+                    speed=raw_payload.get("speed"),
+                    with_seq=True,
+                )
+                processor.process(
+                    asset_id, point, raw_payload, window, l1_features,
+                    window_seq=window_seq,
+                )
 
-        # =========================
-        # 1️⃣ SCADA (VALUES ONLY)
-        # =========================
-        publisher.publish_scada(
-            asset_id,
-            point,
-            {
-                "asset": asset_id,
-                "point": point,
-                "acceleration_rms_g": l1_features["acc_rms_g"],
-                "acc_peak_g": l1_features["acc_peak_g"],
-                "acc_hf_rms_g": l1_features["acc_hf_rms_g"],
-                "crest_factor": l1_features["crest_factor"],
-                "envelope_rms": l1_features["envelope_rms"],
-                "overall_vel_rms_mm_s": l1_features["overall_vel_rms_mm_s"],
-                "energy_low": l1_features["energy_low"],
-                "energy_high": l1_features["energy_high"],
-                "temperature_c": raw_payload.get("temperature"),
-                "point_health_index": phi,
-                "state": state,
-            },
-        )
+        if window_batch is not None:
+            with batch_lock:
+                if window_batch.is_due():
+                    flush_batch()
 
         # =========================
-        # 2️⃣ FINAL HEALTH ALARM
+        # HEARTBEAT
         # =========================
-        publisher.publish_health_alarm(
-            asset_id,
-            point,
-            {
-                "asset": asset_id,
-                "point": point,
-                "state": state,
-                "point_health_index": phi,
-                "timestamp": time.time(),
-            },
-        )
+        with heartbeat_lock:
+            now = time.time()
+            if now - last_heartbeat_ts >= HEARTBEAT_INTERVAL:
+                publisher.publish_heartbeat(heartbeat.snapshot())
+                last_heartbeat_ts = now
 
-        # =========================
-        # 3️⃣ INTERPRETATION (WHY)
-        # =========================
-        publisher.publish_interpretation(asset_id, point, interpretation)
+    # Flush a partially filled batch when no further message arrives
+    def batch_ticker():
+        while True:
+            time.sleep(window_batch.tick_sec)
+            with batch_lock:
+                if window_batch.is_due():
+                    flush_batch()
 
-        # =========================
-        # 4️⃣ RECOMMENDATION (WHAT)
-        # =========================
-        publisher.publish_recommendation(
-            asset_id,
-            point,
-            {
-                "asset": asset_id,
-                "point": point,
-                "state": state,
-                "fault_type": fault_type,
-                "rec_level": recommendation.get("level"),
-                "rec_priority": recommendation.get("priority"),
-                "rec_action_code": recommendation.get("action_code"),
-                "rec_text": recommendation.get("text"),
-                "timestamp": time.time(),
-            },
-        )
+    if window_batch is not None:
+        threading.Thread(target=batch_ticker, daemon=True).start()
 
-        # =========================
-        # 5️⃣ EARLY FAULT (EVIDENCE)
-        # =========================
-        publisher.publish_early_fault(
-            asset_id,
-            point,
-            {
-                "asset": asset_id,
-                "point": point,
-                "fsm_state": early_fault.state.value,
-                "confidence": early_fault.confidence,
-                "fault_type": fault_type,
-                "timestamp": early_fault.timestamp,
-            },
+    # =========================
+    # INGEST QUEUES
+    # MQTT thread only decodes + enqueues; workers run on_raw_data
+    # =========================
+    ingest_cfg = config.get("ingest", {})
+    dispatcher = PointQueueDispatcher(
+        callback=on_raw_data,
+        workers=ingest_cfg.get("workers", 2),
+        maxsize=ingest_cfg.get("queue_size", 8),
+        policy=ingest_cfg.get("overflow", "drop_oldest"),
+    )
+    dispatcher.start()
+    heartbeat.register_source("ingest", dispatcher.stats)
+
+    # SIGTERM (systemd / docker stop) → same path as Ctrl+C:
+    # stop ingest and workers, write the state checkpoint
+    signal.signal(signal.SIGTERM, _raise_system_exit)
+
+    try:
+        start_mqtt_listener(
+            callback=dispatcher.submit,
+            broker=config["mqtt"]["broker"],
+            port=config["mqtt"]["port"],
+            topic=config["mqtt"]["raw_topic"],
         )
+    finally:
+        dispatcher.stop()
+        if executor is not None:
+            executor.stop()
+        if processor is not None:
+            processor.close()
+        publisher.close()
 
-        # =========================
-        # L2 TRIGGER
-        # =========================
-        if config["l2"]["enable"] and state in ("WARNING", "ALARM"):
-            if l2_cooldown.can_trigger(asset_id, point, state):
-                l2_queue.enqueue(
-                    {
-                        "asset": asset_id,
-                        "point": point,
-                        "window": window,
-                        "early_fault_event": {
-                            "fsm_state": early_fault.state.value,
-                            "fault_type": fault_type,
-                            "confidence": early_fault.confidence,
-                        },
-                        "health_event": {
-                            "state": state,
-                            "point_health_index": phi,
-                        },
-                        "publisher": publisher,
-                    }
-                )
-                l2_cooldown.mark_triggered(asset_id, point)
-
-        # =========================
-        # HEARTBEAT
-        # =========================
-        now = time.time()
-        if now - last_heartbeat_ts >= HEARTBEAT_INTERVAL:
-            publisher.publish_heartbeat(heartbeat.snapshot())
-            last_heartbeat_ts = now
 
-    start_mqtt_listener(
-        callback=on_raw_data,
-        broker=config["mqtt"]["broker"],
-        port=config["mqtt"]["port"],
-        topic=config["mqtt"]["raw_topic"],
-    )
+def _raise_system_exit(signum, frame):
+    raise SystemExit(0)
 
 
 if __name__ == "__main__":
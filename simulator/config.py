@@ -48,5 +48,9 @@ SIM_CONFIG = {
     # ======================
     "broker": "localhost",
     "topic": "vibration/raw/PUMP_01/DE",
+
+    # json | binary (binary needs the repo root on PYTHONPATH)
+    "payload_format": "json",
+    "binary_dtype": "int16",   # int16 | float32
 }
 
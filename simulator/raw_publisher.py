@@ -5,6 +5,10 @@ import time
 import paho.mqtt.publish as publish
 
 def publish_raw(cfg, acc):
+    if cfg.get("payload_format", "json") == "binary":
+        publish.single(cfg["topic"], _binary_payload(cfg, acc), hostname=cfg["broker"])
+        return
+
     payload = {
         "asset": cfg["asset"],
         "point": cfg["point"],
@@ -19,3 +23,18 @@ def publish_raw(cfg, acc):
         json.dumps(payload),
         hostname=cfg["broker"]
     )
+
+
+def _binary_payload(cfg, acc):
+    # needs the repo root on PYTHONPATH (only for the binary format)
+    from raw_ingest.raw_codec import encode_raw_frame
+
+    return encode_raw_frame(
+        asset=cfg["asset"],
+        point=cfg["point"],
+        samples=acc,
+        fs=cfg["fs"],
+        temperature=cfg["temp_base"],
+        speed=cfg["speed_rpm"],
+        dtype=cfg.get("binary_dtype", "int16"),
+    )
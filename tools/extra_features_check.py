@@ -0,0 +1,86 @@
+"""
+l1_feature.extra_features lookup check.
+
+Applies the documented example of config/system.yaml to the points
+table and fails (exit code 1) unless every spelling of the point
+(P3GX as sent by the devices, p3gx as in the tables) gets the example's
+extra features in its L1 output.
+
+Run:  python tools/extra_features_check.py  (or python -m tools.extra_features_check)
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Also runnable as a plain script: repo root on the import path
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config.config_loader import load_points  # noqa: E402
+from core.l1_feature_pipeline import L1FeaturePipeline  # noqa: E402
+from core.point_profile import (  # noqa: E402
+    build_point_profile,
+    extras_for,
+    normalize_extra_features,
+)
+
+FS = 25600
+WINDOW = 4096
+ASSET = "PUMP_01"
+
+# Documented example (config/system.yaml, l1_feature.extra_features)
+EXAMPLE = {
+    "p3gx": ["kurtosis", "order_1x_rms", "order_2x_rms"],
+    "p7pp": ["skewness", "bpfo_rms", "bpfi_rms"],
+}
+
+CASES = [
+    # (extra_features, asset, point, expected extras)
+    (EXAMPLE, ASSET, "P3GX", EXAMPLE["p3gx"]),
+    (EXAMPLE, ASSET, "p3gx", EXAMPLE["p3gx"]),
+    (EXAMPLE, ASSET, "P1MT", []),
+    ({"P3GX": ["kurtosis"]}, ASSET, "p3gx", ["kurtosis"]),
+    (
+        {"p3gx": ["kurtosis"], "Pump_01:P3GX": ["skewness"]},
+        ASSET, "P3GX", ["skewness"],
+    ),
+]
+
+
+def main():
+    points = load_points(str(ROOT / "config" / "config.yaml"))
+    pipeline = L1FeaturePipeline(FS, rpm=2980)
+    window = np.random.default_rng(0).normal(0, 0.05, WINDOW)
+
+    failed = False
+    for table, asset, point, expected in CASES:
+        extra_features = {
+            key: L1FeaturePipeline.validate_features(names)
+            for key, names in normalize_extra_features(table).items()
+        }
+        profile = build_point_profile(
+            point,
+            points.get(point.lower()),
+            fs=FS,
+            window_size=WINDOW,
+            rpm_default=2980,
+            extras=extras_for(extra_features, asset, point),
+        )
+        features = pipeline.compute(
+            window, extras=profile.extras, profile=profile
+        )
+
+        ok = (
+            list(profile.extras) == expected
+            and all(features.get(name) is not None for name in expected)
+        )
+        failed |= not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {asset}:{point:<6} "
+              f"{sorted(table)} → {list(profile.extras)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,9 @@ WINDOW = 4096
 BASE_RPM = 2980
 FR = BASE_RPM / 60
 
+# json | binary (binary needs the repo root on PYTHONPATH)
+PAYLOAD_FORMAT = "json"
+
 POINTS = {
     "P1MT": "motor",
     "P2MT": "motor",
@@ -51,6 +54,18 @@ def pump_signal(t, severity):
     return sig
 
 
+def encode_payload(point, acc):
+    if PAYLOAD_FORMAT == "binary":
+        from raw_ingest.raw_codec import encode_raw_frame
+
+        return encode_raw_frame(ASSET, point, acc, fs=FS)
+
+    return json.dumps({
+        "timestamp": time.time(),
+        "acceleration": acc.tolist(),
+    })
+
+
 # =========================
 # MAIN LOOP
 # =========================
@@ -69,15 +84,10 @@ def main():
             else:
                 acc = pump_signal(t, severity)
 
-            payload = {
-                "timestamp": time.time(),
-                "acceleration": acc.tolist(),
-            }
-
             topic = f"vibration/raw/{ASSET}/{point}"
             publish.single(
                 topic,
-                json.dumps(payload),
+                encode_payload(point, acc),
                 hostname=BROKER,
                 port=PORT,
             )
@@ -0,0 +1,73 @@
+"""
+float32 vs float64 L1 precision check.
+
+Runs the L1 pipeline in both precisions over synthetic machine signals
+and fails (exit code 1) when any published feature deviates from the
+float64 reference by more than REL_TOLERANCE.
+
+Run:  python tools/precision_check.py  (or python -m tools.precision_check)
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Also runnable as a plain script: repo root on the import path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.l1_feature_pipeline import L1FeaturePipeline  # noqa: E402
+
+FS = 25600
+WINDOW = 4096
+FR = 2980 / 60
+
+# Stated tolerance for l1_feature.dtype: float32
+REL_TOLERANCE = 1e-4
+ABS_FLOOR = 1e-9     # features this small are compared absolutely
+
+CASES = 200
+
+
+def synthetic_window(rng, t):
+    sig = 0.02 * np.sin(2 * np.pi * FR * t)
+    sig += rng.uniform(0, 0.06) * np.sin(2 * np.pi * 20 * FR * t)
+    sig += rng.normal(0, rng.uniform(0.001, 0.08), t.size)
+    sig += rng.uniform(-0.05, 0.05)   # sensor DC offset
+
+    # bearing-like impulses
+    for idx in rng.integers(0, t.size, rng.integers(0, 6)):
+        sig[idx] += rng.uniform(0.25, 0.6)
+
+    return sig
+
+
+def main():
+    rng = np.random.default_rng(0)
+    t = np.arange(WINDOW) / FS
+
+    ref = L1FeaturePipeline(FS, rpm=FR * 60, dtype=np.float64)
+    single = L1FeaturePipeline(FS, rpm=FR * 60, dtype=np.float32)
+
+    windows = np.stack([synthetic_window(rng, t) for _ in range(CASES)])
+
+    expected = ref.compute_batch(windows)
+    actual = single.compute_batch(windows.astype(np.float32))
+
+    worst = {}
+    for exp, act in zip(expected, actual):
+        for name, value in exp.items():
+            err = abs(act[name] - value) / max(abs(value), ABS_FLOOR)
+            worst[name] = max(worst.get(name, 0.0), err)
+
+    failed = False
+    for name, err in worst.items():
+        ok = err <= REL_TOLERANCE
+        failed |= not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {name:<24} max rel err {err:.2e}")
+
+    print(f"tolerance {REL_TOLERANCE:.0e} over {CASES} windows")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
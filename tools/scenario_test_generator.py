@@ -12,6 +12,9 @@ WINDOW = 4096
 RPM = 2980
 FR = RPM / 60
 
+# json | binary (binary needs the repo root on PYTHONPATH)
+PAYLOAD_FORMAT = "json"
+
 POINTS = {
     "P1MT": "unbalance",
     "P2MT": "misalignment",
@@ -66,6 +69,18 @@ FAULT_MAP = {
 }
 
 
+def encode_payload(point, acc):
+    if PAYLOAD_FORMAT == "binary":
+        from raw_ingest.raw_codec import encode_raw_frame
+
+        return encode_raw_frame(ASSET, point, acc, fs=FS)
+
+    return json.dumps({
+        "timestamp": time.time(),
+        "acceleration": acc.tolist(),
+    })
+
+
 # =========================
 # SCENARIO PHASES
 # =========================
@@ -89,13 +104,8 @@ def main():
                 acc = FAULT_MAP[fault](t, severity)
                 acc += 0.005 * np.random.randn(len(t))  # noise floor
 
-                payload = {
-                    "timestamp": time.time(),
-                    "acceleration": acc.tolist(),
-                }
-
                 topic = f"vibration/raw/{ASSET}/{point}"
-                publish.single(topic, json.dumps(payload),
+                publish.single(topic, encode_payload(point, acc),
                                hostname=BROKER, port=PORT)
 
             time.sleep(1)
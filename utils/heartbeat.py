@@ -21,6 +21,9 @@ class Heartbeat:
         self.last_early_fault = None
         self.last_l2_exec = None
 
+        # ---- EXTRA SECTIONS (name -> callable returning dict) ----
+        self._sources = {}
+
     # ---- MARKERS ----
     def mark_raw_rx(self):
         self.raw_rx_count += 1
@@ -42,6 +45,14 @@ class Heartbeat:
         self.l2_exec_count += 1
         self.last_l2_exec = time.time()
 
+    # ---- EXTRA SECTIONS ----
+    def register_source(self, name: str, provider):
+        """
+        Attach a stats provider (e.g. executor, queues); its dict is
+        published under ``name`` in every snapshot.
+        """
+        self._sources[name] = provider
+
     # ---- SNAPSHOT ----
     def snapshot(self):
         now = time.time()
@@ -52,7 +63,7 @@ class Heartbeat:
             if now - self.last_raw_rx > 10:   # 10s tanpa data → STALE
                 status = "STALE"
 
-        return {
+        snapshot = {
             "service": self.service_name,
             "status": status,
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -72,3 +83,8 @@ class Heartbeat:
             "last_early_fault": self.last_early_fault,
             "last_l2_exec": self.last_l2_exec,
         }
+
+        for name, provider in self._sources.items():
+            snapshot[name] = provider()
+
+        return snapshot